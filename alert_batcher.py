@@ -0,0 +1,145 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Tuple, Callable, Awaitable, Optional
+
+from metrics import metrics
+from alert_coalescer import alert_key
+from log_context import alert_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GATHER_SECONDS = 3.0
+DEFAULT_MAX_BATCH = 20
+# Tag used to group alerts that don't name a service (e.g. team:payments)
+GROUP_TAG = os.getenv("ALERT_GROUP_TAG", "team").strip().lower()
+
+
+def alert_group(payload: Dict[str, Any]) -> str:
+    """
+    Correlation key within a room: the alert's service, else its ALERT_GROUP_TAG tag.
+    Alerts with neither are never folded with others.
+    """
+    service = alert_service(payload)
+    if service:
+        return f"service:{service}"
+    tags = payload.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    prefix = f"{GROUP_TAG}:"
+    for tag in tags:
+        tag = str(tag).strip().lower()
+        if tag.startswith(prefix) and len(tag) > len(prefix):
+            return tag
+    return f"alert:{alert_key(payload)[:12]}"
+
+
+def group_alerts(payloads: List[Dict[str, Any]], room_of: Callable[[Dict[str, Any]], str]) -> "OrderedDict[Tuple[str, str], List[Dict[str, Any]]]":
+    """(room, group) -> alerts, in arrival order; re-deliveries of the same alert are dropped."""
+    groups: "OrderedDict[Tuple[str, str], List[Dict[str, Any]]]" = OrderedDict()
+    seen = set()
+    for payload in payloads:
+        key = alert_key(payload)
+        if key in seen:
+            continue
+        seen.add(key)
+        groups.setdefault((room_of(payload), alert_group(payload)), []).append(payload)
+    return groups
+
+
+class _Gather:
+    def __init__(self, future: asyncio.Future, handle: Callable[[List[Dict[str, Any]]], Awaitable[Dict[str, Any]]]):
+        self.payloads: List[Dict[str, Any]] = []
+        self.future = future
+        self.handle = handle
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class AlertBatcher:
+    """
+    Folds correlated alerts that arrive close together into one SitRep per group.
+
+    The first alert of a group after a quiet spell is handled immediately (no added latency for
+    isolated alerts). Alerts of the same group arriving within the next `window_seconds` are
+    gathered and handled together when the window closes (or once `max_batch` are waiting),
+    so a cascade produces at most one SitRep per group per window.
+    """
+
+    def __init__(self, window_seconds: float = DEFAULT_GATHER_SECONDS, max_batch: int = DEFAULT_MAX_BATCH):
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._last_flush: Dict[Tuple[str, str], float] = {}
+        self._open: Dict[Tuple[str, str], _Gather] = {}
+        self._background: set = set()
+
+    async def submit(self, key: Tuple[str, str], payload: Dict[str, Any],
+                     handle: Callable[[List[Dict[str, Any]]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Result of `handle(alerts)` for the batch this alert ends up in.
+        `handle` is called once per batch with its alerts in arrival order; for a gathered
+        batch, the handle passed by the alert that opened it is used.
+        """
+        if self.window_seconds <= 0:
+            return await handle([payload])
+
+        now = time.monotonic()
+        self._prune(now)
+        gather = self._open.get(key)
+        if gather is None:
+            last = self._last_flush.get(key)
+            if last is None or now - last >= self.window_seconds:
+                self._last_flush[key] = now
+                return await handle([payload])
+            loop = asyncio.get_running_loop()
+            gather = _Gather(loop.create_future(), handle)
+            gather.timer = loop.call_later(last + self.window_seconds - now, self._flush, key)
+            self._open[key] = gather
+
+        gather.payloads.append(payload)
+        logger.info(f"Alert gathered into {key} batch ({len(gather.payloads)} waiting).")
+        try:
+            metrics.increment('echo_ops.alert.batched', tags=["service:sentinel-ai"])
+        except Exception:
+            pass
+        if len(gather.payloads) >= self.max_batch:
+            gather.timer.cancel()
+            self._flush(key)
+        return await asyncio.shield(gather.future)
+
+    def _flush(self, key: Tuple[str, str]):
+        gather = self._open.pop(key, None)
+        if gather is None:
+            return
+        self._last_flush[key] = time.monotonic()
+        try:
+            metrics.gauge('echo_ops.alert.batch.size', len(gather.payloads), tags=["service:sentinel-ai"])
+        except Exception:
+            pass
+
+        async def run():
+            try:
+                gather.future.set_result(await gather.handle(gather.payloads))
+            except asyncio.CancelledError:
+                gather.future.cancel()  # Waiters see the cancellation rather than hang
+                raise
+            except Exception as e:
+                gather.future.set_exception(e)
+                gather.future.exception()  # Retrieved; waiters re-raise it themselves
+
+        # Keep a reference: the loop only holds tasks weakly
+        task = asyncio.create_task(run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _prune(self, now: float):
+        expired = [k for k, t in self._last_flush.items() if now - t >= self.window_seconds and k not in self._open]
+        for k in expired:
+            del self._last_flush[k]
+
+
+alert_batcher = AlertBatcher(
+    window_seconds=float(os.getenv("ALERT_GATHER_SECONDS", DEFAULT_GATHER_SECONDS)),
+    max_batch=int(os.getenv("ALERT_GATHER_MAX_BATCH", DEFAULT_MAX_BATCH)),
+)
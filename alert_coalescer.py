@@ -0,0 +1,80 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Dict, Any, Tuple, Callable, Awaitable
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_SECONDS = 60.0
+
+
+def alert_key(payload: Dict[str, Any]) -> str:
+    """
+    Identity of an alert across re-deliveries: monitor id + title + query.
+    The per-delivery event id is deliberately ignored.
+    """
+    monitor_id = payload.get("monitor_id", payload.get("alert_id", ""))
+    title = payload.get("event_title", payload.get("title", ""))
+    query = payload.get("alert_query", "")
+    raw = f"{monitor_id}\x00{title}\x00{query}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class AlertCoalescer:
+    """
+    Collapses repeated deliveries of the same alert within a window.
+    The first delivery builds the SitRep; duplicates attach to its in-flight or finished result.
+    """
+
+    def __init__(self, window_seconds: float = DEFAULT_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        # key -> (first_seen, future of the SitRep response)
+        self._entries: Dict[str, Tuple[float, asyncio.Future]] = {}
+
+    def _prune(self, now: float):
+        expired = [k for k, (seen, fut) in self._entries.items() if fut.done() and now - seen >= self.window_seconds]
+        for k in expired:
+            del self._entries[k]
+
+    async def run(self, payload: Dict[str, Any], compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Returns (result, duplicate). Failed computations are forgotten so the next delivery retries.
+        The computation runs in its own task, so cancelling one caller doesn't cancel it for the others.
+        """
+        if self.window_seconds <= 0:
+            return await compute(), False
+
+        now = time.monotonic()
+        self._prune(now)
+        key = alert_key(payload)
+
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < self.window_seconds:
+            state = "finished" if entry[1].done() else "inflight"
+            logger.info(f"Duplicate alert suppressed ({state}): {payload.get('event_title', payload.get('title'))}")
+            try:
+                metrics.increment('echo_ops.alert.suppressed', tags=["service:sentinel-ai", f"state:{state}"])
+            except Exception:
+                pass
+            return await asyncio.shield(entry[1]), True
+
+        # Own task: a leader whose webhook is cancelled doesn't cancel the SitRep its duplicates await
+        task = asyncio.ensure_future(compute())
+        self._entries[key] = (now, task)
+        task.add_done_callback(lambda t: self._land(key, t))
+        return await asyncio.shield(task), False
+
+    def _land(self, key: str, task: asyncio.Future):
+        # exception() also marks a failure retrieved; waiters re-raise it themselves
+        if task.cancelled() or task.exception() is not None:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is task:
+                del self._entries[key]
+
+alert_coalescer = AlertCoalescer(
+    window_seconds=float(os.getenv("ALERT_COALESCE_WINDOW_SECONDS", DEFAULT_WINDOW_SECONDS))
+)
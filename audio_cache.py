@@ -0,0 +1,216 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Defaults (override via env)
+DEFAULT_MEMORY_MAX_BYTES = 8 * 1024 * 1024    # 8 MB of hot clips
+DEFAULT_MEMORY_MAX_ENTRIES = 256
+DEFAULT_DISK_MAX_BYTES = 64 * 1024 * 1024     # 64 MB on disk
+DEFAULT_DISK_DIR = os.path.join(".cache", "tts")
+
+
+def cache_key(text: str, voice_id: str, provider: str, model: str) -> str:
+    """
+    Content address for a clip: sha256 over (text, voice_id, provider, model).
+    """
+    h = hashlib.sha256()
+    for part in (text, voice_id, provider, model):
+        h.update((part or "").encode("utf-8"))
+        h.update(b"\x00")  # Separator so ("ab", "c") != ("a", "bc")
+    return h.hexdigest()
+
+
+class AudioCache:
+    """
+    Two-tier TTS audio cache.
+    Tier 1: in-memory LRU bounded by bytes and entry count.
+    Tier 2: on-disk store bounded by total bytes (oldest access evicted first).
+    """
+
+    def __init__(
+        self,
+        disk_dir: str = DEFAULT_DISK_DIR,
+        memory_max_bytes: int = DEFAULT_MEMORY_MAX_BYTES,
+        memory_max_entries: int = DEFAULT_MEMORY_MAX_ENTRIES,
+        disk_max_bytes: int = DEFAULT_DISK_MAX_BYTES,
+    ):
+        self.disk_dir = disk_dir
+        self.memory_max_bytes = memory_max_bytes
+        self.memory_max_entries = memory_max_entries
+        self.disk_max_bytes = disk_max_bytes
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # key -> size; ordered oldest access first
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+
+        self.stats = {"hits_memory": 0, "hits_disk": 0, "misses": 0, "evictions_memory": 0, "evictions_disk": 0}
+
+        if self.disk_max_bytes > 0:
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+                self._load_disk_index()
+            except Exception as e:
+                logger.warning(f"Audio cache disk tier disabled: {e}")
+                self.disk_max_bytes = 0
+
+    # --- Public API ---
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.stats["hits_memory"] += 1
+                self._count("hit", "memory")
+                return audio
+
+            if key in self._disk:
+                audio = self._read_disk(key)
+                if audio is not None:
+                    self._disk.move_to_end(key)
+                    self._put_memory(key, audio)
+                    self.stats["hits_disk"] += 1
+                    self._count("hit", "disk")
+                    return audio
+
+            self.stats["misses"] += 1
+            self._count("miss")
+            return None
+
+    def put(self, key: str, audio: bytes) -> None:
+        if not audio:
+            return
+        with self._lock:
+            self._put_memory(key, audio)
+            self._put_disk(key, audio)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current cache occupancy and counters (for /debug/audio)."""
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                **self.stats,
+            }
+
+    # --- Memory Tier ---
+
+    def _put_memory(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.memory_max_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+
+        while self._memory and (
+            self._memory_bytes > self.memory_max_bytes or len(self._memory) > self.memory_max_entries
+        ):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats["evictions_memory"] += 1
+            self._count("eviction", "memory")
+
+    # --- Disk Tier ---
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.audio")
+
+    def _load_disk_index(self) -> None:
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".audio"):
+                continue
+            st = os.stat(os.path.join(self.disk_dir, name))
+            entries.append((st.st_mtime, name[: -len(".audio")], st.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path, None)  # Refresh access order across restarts
+            return audio
+        except OSError:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            return None
+
+    def _put_disk(self, key: str, audio: bytes) -> None:
+        if self.disk_max_bytes <= 0 or len(audio) > self.disk_max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Audio cache disk write failed: {e}")
+            return
+
+        self._disk_bytes -= self._disk.pop(key, 0)
+        self._disk[key] = len(audio)
+        self._disk_bytes += len(audio)
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        while self._disk and self._disk_bytes > self.disk_max_bytes:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            self.stats["evictions_disk"] += 1
+            self._count("eviction", "disk")
+
+    # --- Metrics ---
+
+    @staticmethod
+    def _count(event: str, tier: Optional[str] = None) -> None:
+        tags = ["service:sentinel-ai"]
+        if tier:
+            tags.append(f"tier:{tier}")
+        try:
+            metrics.increment(f"echo_ops.tts.cache.{event}", tags=tags)
+        except Exception:
+            pass
+
+
+_cache: Optional[AudioCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> Optional[AudioCache]:
+    """
+    Process-wide cache instance, configured from env.
+    Returns None when AUDIO_CACHE_ENABLED=false.
+    """
+    global _cache
+    if os.getenv("AUDIO_CACHE_ENABLED", "true").lower().strip() in ("false", "0", "no"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = AudioCache(
+                disk_dir=os.getenv("AUDIO_CACHE_DIR", DEFAULT_DISK_DIR),
+                memory_max_bytes=int(os.getenv("AUDIO_CACHE_MEMORY_MAX_BYTES", DEFAULT_MEMORY_MAX_BYTES)),
+                memory_max_entries=int(os.getenv("AUDIO_CACHE_MEMORY_MAX_ENTRIES", DEFAULT_MEMORY_MAX_ENTRIES)),
+                disk_max_bytes=int(os.getenv("AUDIO_CACHE_DISK_MAX_BYTES", DEFAULT_DISK_MAX_BYTES)),
+            )
+        return _cache
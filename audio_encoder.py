@@ -0,0 +1,325 @@
+import os
+import time
+import shutil
+import struct
+import asyncio
+import logging
+import subprocess
+from array import array
+from typing import Optional, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# AUDIO_OUTPUT_FORMAT:
+#   source - serve provider output unchanged
+#   auto   - MP3 via the local ffmpeg if installed (plays in every browser), else AUDIO_ENCODER_FALLBACK
+#   opus / mp3        - encoded by ffmpeg (OGG/Opus, MP3)
+# Only PCM/WAV provider output is encoded; compressed output (ElevenLabs MP3) is served as is.
+#   ulaw / adpcm / wav - pure-Python WAV encodings (8-bit G.711 mu-law, 4-bit IMA ADPCM, 16-bit PCM)
+OUTPUT_FORMATS = ("source", "auto", "opus", "mp3", "ulaw", "adpcm", "wav")
+ENCODER_FORMATS = {"opus": "ogg", "mp3": "mp3"}  # format -> container extension
+PCM_FORMATS = ("ulaw", "adpcm", "wav")
+
+DEFAULT_BITRATES = {"opus": "24k", "mp3": "32k"}
+ENCODER_TIMEOUT = 10.0
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_MULAW = 0x0007
+WAVE_FORMAT_IMA_ADPCM = 0x0011
+
+
+# --- WAV ---
+
+def parse_wav(audio: bytes) -> Optional[Tuple[bytes, int]]:
+    """(pcm, sample_rate) for 16-bit mono PCM WAV (including open-ended stream headers), else None."""
+    if audio[:4] != b"RIFF" or audio[8:12] != b"WAVE":
+        return None
+    pos, fmt = 12, None
+    while pos + 8 <= len(audio):
+        chunk_id = audio[pos:pos + 4]
+        size = struct.unpack("<I", audio[pos + 4:pos + 8])[0]
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", audio[body:body + 16])
+        elif chunk_id == b"data":
+            if fmt is None or fmt[0] != WAVE_FORMAT_PCM or fmt[1] != 1 or fmt[5] != 16:
+                return None
+            data = audio[body:body + size] if size != 0xFFFFFFFF else audio[body:]
+            return data[:len(data) - len(data) % 2], fmt[2]
+        pos = body + size + (size & 1)
+    return None
+
+
+def _wav(format_tag: int, sample_rate: int, byte_rate: int, block_align: int, bits: int,
+         data: bytes, extra: bytes = b"", frames: Optional[int] = None) -> bytes:
+    """Mono WAV file. Non-PCM formats get the `cbSize` extension and a `fact` chunk (frame count)."""
+    fmt = struct.pack("<HHIIHH", format_tag, 1, sample_rate, byte_rate, block_align, bits)
+    chunks = []
+    if format_tag == WAVE_FORMAT_PCM:
+        chunks.append(b"fmt " + struct.pack("<I", len(fmt)) + fmt)
+    else:
+        fmt += struct.pack("<H", len(extra)) + extra
+        chunks.append(b"fmt " + struct.pack("<I", len(fmt)) + fmt)
+        chunks.append(b"fact" + struct.pack("<II", 4, frames))
+    chunks.append(b"data" + struct.pack("<I", len(data)) + data + (b"\x00" if len(data) & 1 else b""))
+    body = b"WAVE" + b"".join(chunks)
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def encode_pcm_wav(pcm: bytes, sample_rate: int) -> bytes:
+    return _wav(WAVE_FORMAT_PCM, sample_rate, sample_rate * 2, 2, 16, pcm)
+
+
+# --- Resampling ---
+
+def resample(pcm: bytes, src_rate: int, dst_rate: int) -> bytes:
+    """
+    16-bit mono PCM rate conversion by linear interpolation. When downsampling, a moving
+    average over one output period is applied first so speech doesn't alias.
+    """
+    if src_rate == dst_rate or not pcm:
+        return pcm
+    samples = array("h", pcm)
+    ratio = src_rate / dst_rate
+    if ratio > 1:
+        width = int(ratio)
+        if width > 1:
+            acc, window, smoothed = 0, [], array("h")
+            for s in samples:
+                window.append(s)
+                acc += s
+                if len(window) > width:
+                    acc -= window.pop(0)
+                smoothed.append(acc // len(window))
+            samples = smoothed
+    n = len(samples)
+    out = array("h", bytes(2 * int(n / ratio)))
+    last = n - 1
+    for i in range(len(out)):
+        pos = i * ratio
+        j = int(pos)
+        if j >= last:
+            out[i] = samples[last]
+        else:
+            frac = pos - j
+            out[i] = int(samples[j] + (samples[j + 1] - samples[j]) * frac)
+    return out.tobytes()
+
+
+# --- mu-law (G.711) ---
+
+def _ulaw_byte(sample: int) -> int:
+    sign = 0x80 if sample < 0 else 0
+    magnitude = min(abs(sample), 32635) + 0x84
+    exponent = 7
+    for exp_mask in (0x4000, 0x2000, 0x1000, 0x800, 0x400, 0x200, 0x100):
+        if magnitude & exp_mask:
+            break
+        exponent -= 1
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return ~(sign | (exponent << 4) | mantissa) & 0xFF
+
+
+_ULAW_TABLE: Optional[bytes] = None
+
+
+def _ulaw_table() -> bytes:
+    """
+    Indexed by the sample's unsigned 16-bit pattern, so a clip encodes with a single map().
+    Built on first use (~40 ms), not at import.
+    """
+    global _ULAW_TABLE
+    if _ULAW_TABLE is None:
+        _ULAW_TABLE = bytes(_ulaw_byte(u - 0x10000 if u & 0x8000 else u) for u in range(0x10000))
+    return _ULAW_TABLE
+
+
+def encode_ulaw_wav(pcm: bytes, sample_rate: int) -> bytes:
+    data = bytes(map(_ulaw_table().__getitem__, array("H", pcm)))
+    return _wav(WAVE_FORMAT_MULAW, sample_rate, sample_rate, 1, 8, data, frames=len(data))
+
+
+# --- IMA ADPCM ---
+
+_IMA_STEPS = [
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45, 50, 55, 60, 66, 73, 80, 88,
+    97, 107, 118, 130, 143, 157, 173, 190, 209, 230, 253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658,
+    724, 796, 876, 963, 1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327, 3660,
+    4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442, 11487, 12635, 13899, 15289, 16818,
+    18500, 20350, 22385, 24623, 27086, 29794, 32767,
+]
+_IMA_INDEX = [-1, -1, -1, -1, 2, 4, 6, 8]
+
+
+def _ima_block_align(sample_rate: int) -> int:
+    # Conventional block size: 256 bytes at 11 kHz, scaled with the rate
+    return 256 * max(1, sample_rate // 11025)
+
+
+def encode_ima_adpcm_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """
+    4-bit IMA ADPCM WAV (4x smaller than PCM). Each block starts with a verbatim sample and
+    step index, so decoding errors can't drift across blocks.
+    """
+    samples = array("h", pcm)
+    block_align = _ima_block_align(sample_rate)
+    per_block = (block_align - 4) * 2 + 1
+    out = bytearray()
+    index = 0
+    for start in range(0, len(samples), per_block):
+        block = samples[start:start + per_block]
+        predicted = block[0]
+        out += struct.pack("<hBB", predicted, index, 0)
+        nibbles = []
+        for s in block[1:]:
+            step = _IMA_STEPS[index]
+            diff = s - predicted
+            code = 0
+            if diff < 0:
+                code, diff = 8, -diff
+            delta = step >> 3
+            if diff >= step:
+                code |= 4
+                diff -= step
+                delta += step
+            step >>= 1
+            if diff >= step:
+                code |= 2
+                diff -= step
+                delta += step
+            step >>= 1
+            if diff >= step:
+                code |= 1
+                delta += step
+            predicted = predicted - delta if code & 8 else predicted + delta
+            predicted = max(-32768, min(32767, predicted))
+            index = max(0, min(88, index + _IMA_INDEX[code & 7]))
+            nibbles.append(code)
+        # The final block is padded with silence codes to its full length
+        nibbles += [0] * ((block_align - 4) * 2 - len(nibbles))
+        out += bytes(nibbles[i] | (nibbles[i + 1] << 4) for i in range(0, len(nibbles), 2))
+    byte_rate = sample_rate * block_align // per_block
+    return _wav(WAVE_FORMAT_IMA_ADPCM, sample_rate, byte_rate, block_align, 4, bytes(out),
+                extra=struct.pack("<H", per_block), frames=len(samples))
+
+
+# --- Encoder ---
+
+class AudioEncoder:
+    """
+    Output stage applied to every synthesized clip before it is cached, stored and served.
+
+    Provider PCM (Gemini and stub output, wrapped in WAV) is resampled and encoded to the
+    configured format. Already-compressed input (ElevenLabs MP3) passes through unchanged:
+    transcoding it would add generation loss and per-clip latency for little size gain.
+    """
+
+    def __init__(self, output_format: str = "auto", sample_rate: int = 0, bitrate: str = "",
+                 fallback: str = "wav", ffmpeg: Optional[str] = None):
+        if output_format not in OUTPUT_FORMATS:
+            logger.warning(f"Unknown AUDIO_OUTPUT_FORMAT '{output_format}'. Using source audio.")
+            output_format = "source"
+        if fallback not in PCM_FORMATS:
+            logger.warning(f"AUDIO_ENCODER_FALLBACK must be one of {PCM_FORMATS}. Using wav.")
+            fallback = "wav"
+        self.requested = output_format
+        self.sample_rate = sample_rate
+        self.fallback = fallback
+        self.ffmpeg = shutil.which(ffmpeg or "ffmpeg")
+        if output_format == "auto":
+            output_format = "mp3" if self.ffmpeg else fallback
+        elif output_format in ENCODER_FORMATS and not self.ffmpeg:
+            logger.warning(f"No local encoder (ffmpeg) for {output_format}. Falling back to {fallback}.")
+            output_format = fallback
+        self.format = output_format
+        self.bitrate = bitrate or DEFAULT_BITRATES.get(output_format, "")
+
+    @property
+    def profile(self) -> str:
+        """Identifies the output encoding (part of the audio cache key)."""
+        if self.format == "source":
+            return "source"
+        return f"{self.format}-{self.bitrate or 'pcm'}-{self.sample_rate or 'native'}"
+
+    def encode(self, audio: bytes) -> bytes:
+        if self.format == "source" or not audio:
+            return audio
+        start = time.monotonic()
+        encoded, fmt = self._encode(audio)
+        if encoded is not audio:
+            self._record(audio, encoded, fmt, time.monotonic() - start)
+        return encoded
+
+    async def aencode(self, audio: bytes) -> bytes:
+        """encode() off the event loop (pure-Python encoding and ffmpeg both block)."""
+        if self.format == "source" or not audio:
+            return audio
+        return await asyncio.to_thread(self.encode, audio)
+
+    def _encode(self, audio: bytes) -> Tuple[bytes, str]:
+        """(clip, format it ended up in). Returns `audio` itself when there was nothing to do."""
+        parsed = parse_wav(audio)
+        if parsed is None:
+            return audio, "source"  # Compressed (or unknown) input is served as the provider made it
+
+        if self.format in ENCODER_FORMATS:
+            encoded = self._ffmpeg(audio)
+            if encoded:
+                return encoded, self.format
+            fmt = self.fallback
+        else:
+            fmt = self.format
+
+        pcm, rate = parsed
+        if fmt == "wav" and self.sample_rate in (0, rate):
+            return audio, fmt
+        if self.sample_rate:
+            pcm, rate = resample(pcm, rate, self.sample_rate), self.sample_rate
+        if fmt == "ulaw":
+            return encode_ulaw_wav(pcm, rate), fmt
+        if fmt == "adpcm":
+            return encode_ima_adpcm_wav(pcm, rate), fmt
+        return encode_pcm_wav(pcm, rate), fmt
+
+    def _ffmpeg(self, audio: bytes) -> Optional[bytes]:
+        cmd = [self.ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-vn", "-ac", "1"]
+        if self.sample_rate:
+            cmd += ["-ar", str(self.sample_rate)]
+        if self.format == "opus":
+            cmd += ["-c:a", "libopus", "-application", "voip", "-b:a", self.bitrate, "-f", "ogg"]
+        else:
+            cmd += ["-c:a", "libmp3lame", "-b:a", self.bitrate, "-f", "mp3"]
+        try:
+            result = subprocess.run(cmd + ["pipe:1"], input=audio, capture_output=True, timeout=ENCODER_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Audio encoder failed: {e}")
+            return None
+        if result.returncode != 0 or not result.stdout:
+            logger.error(f"Audio encoder failed ({result.returncode}): {result.stderr.decode(errors='replace')[:200]}")
+            return None
+        return result.stdout
+
+    def _record(self, audio: bytes, encoded: bytes, fmt: str, seconds: float):
+        logger.info(f"Encoded clip: {len(audio)} -> {len(encoded)} bytes ({fmt}, {seconds * 1000:.0f} ms).")
+        try:
+            tags = ["service:sentinel-ai", f"format:{fmt}"]
+            metrics.gauge('echo_ops.audio.encode.bytes', len(audio), tags=tags + ["stage:input"])
+            metrics.gauge('echo_ops.audio.encode.bytes', len(encoded), tags=tags + ["stage:output"])
+            metrics.gauge('echo_ops.audio.encode.duration', seconds, tags=tags)
+        except Exception:
+            pass
+
+    def snapshot(self):
+        return {"format": self.format, "requested": self.requested, "profile": self.profile,
+                "encoder": self.ffmpeg, "fallback": self.fallback}
+
+
+audio_encoder = AudioEncoder(
+    output_format=os.getenv("AUDIO_OUTPUT_FORMAT", "auto").lower().strip(),
+    sample_rate=int(os.getenv("AUDIO_OUTPUT_SAMPLE_RATE", "0")),
+    bitrate=os.getenv("AUDIO_ENCODER_BITRATE", "").strip(),
+    fallback=os.getenv("AUDIO_ENCODER_FALLBACK", "wav").lower().strip(),
+    ffmpeg=os.getenv("AUDIO_ENCODER_BIN") or None,
+)
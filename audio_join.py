@@ -0,0 +1,150 @@
+import os
+import logging
+from array import array
+from typing import Optional, List, Tuple
+
+from audio_encoder import parse_wav, encode_pcm_wav
+from audio_store import sniff_extension
+
+logger = logging.getLogger(__name__)
+
+# Pause inserted between joined PCM chunks, and the fade applied at each seam (ms).
+# With no pause, the fade length is an overlapping crossfade instead.
+JOIN_SILENCE_MS = int(os.getenv("TTS_JOIN_SILENCE_MS", "120"))
+JOIN_FADE_MS = int(os.getenv("TTS_JOIN_FADE_MS", "10"))
+
+# MPEG audio Layer III tables (kbps, Hz), indexed by header fields
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+# --- PCM ---
+
+def join_pcm(pieces: List[bytes], sample_rate: int, silence_ms: int = JOIN_SILENCE_MS,
+             fade_ms: int = JOIN_FADE_MS) -> bytes:
+    """
+    Joins 16-bit mono PCM. Seams get `silence_ms` of silence with short fades either side
+    (no clicks from cutting mid-waveform), or an overlapping crossfade when `silence_ms` is 0.
+    """
+    fade = int(sample_rate * fade_ms / 1000)
+    gap = array("h", bytes(2 * int(sample_rate * silence_ms / 1000)))
+    out = array("h", pieces[0])
+    for piece in pieces[1:]:
+        nxt = array("h", piece)
+        if gap:
+            _fade(out, fade, fade_in=False)
+            _fade(nxt, fade, fade_in=True)
+            out.extend(gap)
+            out.extend(nxt)
+            continue
+        n = min(fade, len(out), len(nxt))
+        base = len(out) - n
+        for i in range(n):
+            w = (i + 1) / (n + 1)
+            out[base + i] = int(out[base + i] * (1 - w) + nxt[i] * w)
+        out.extend(nxt[n:])
+    return out.tobytes()
+
+
+def _fade(samples: array, length: int, fade_in: bool):
+    length = min(length, len(samples))
+    for i in range(length):
+        w = (i + 1) / (length + 1)
+        idx = i if fade_in else len(samples) - 1 - i
+        samples[idx] = int(samples[idx] * w)
+
+
+# --- MP3 ---
+
+def _skip_id3v2(data: bytes) -> int:
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = 0
+    for b in data[6:10]:
+        size = (size << 7) | (b & 0x7F)  # syncsafe integer
+    return 10 + size + (10 if data[5] & 0x10 else 0)
+
+
+def _mp3_frame(data: bytes, pos: int) -> Optional[Tuple[int, tuple]]:
+    """(frame length, stream params) for a Layer III frame header at `pos`, else None."""
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return None
+    version = (data[pos + 1] >> 3) & 0x03  # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+    layer = (data[pos + 1] >> 1) & 0x03    # 1 = Layer III
+    bitrate_idx = data[pos + 2] >> 4
+    rate_idx = (data[pos + 2] >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None
+    bitrate = _MP3_BITRATES[1 if version == 3 else 2][bitrate_idx] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_idx]
+    padding = (data[pos + 2] >> 1) & 0x01
+    length = (144 if version == 3 else 72) * bitrate // sample_rate + padding
+    channels = data[pos + 3] >> 6
+    return length, (version, sample_rate, channels == 3)
+
+
+def mp3_frames(data: bytes) -> Tuple[List[bytes], Optional[tuple]]:
+    """
+    Audio frames of an MP3 clip (ID3 tags and the Xing/Info header frame dropped, since
+    their sizes and frame counts would be wrong for the joined stream), plus its stream params.
+    """
+    pos = _skip_id3v2(data)
+    frames, params = [], None
+    while pos < len(data):
+        frame = _mp3_frame(data, pos)
+        if frame is None:
+            if data[pos:pos + 3] == b"TAG":
+                break  # ID3v1 trailer
+            pos += 1  # Resync
+            continue
+        length, frame_params = frame
+        chunk = data[pos:pos + length]
+        if params is None:
+            params = frame_params
+            if b"Xing" in chunk[:64] or b"Info" in chunk[:64]:
+                pos += length
+                continue
+        frames.append(chunk)
+        pos += length
+    return frames, params
+
+
+def join_mp3(clips: List[bytes]) -> Optional[bytes]:
+    """Concatenates clips at frame boundaries; None if they were encoded with different parameters."""
+    out, params = [], None
+    for clip in clips:
+        frames, clip_params = mp3_frames(clip)
+        if not frames:
+            return None
+        if params is not None and clip_params != params:
+            return None
+        params = clip_params
+        out.extend(frames)
+    return b"".join(out)
+
+
+# --- Entry point ---
+
+def join_clips(clips: List[bytes]) -> Optional[bytes]:
+    """
+    One clip from chunks synthesized separately, in order. Returns None when the chunks can't
+    be joined cleanly (mixed formats after a provider fallback, mismatched rates).
+    """
+    if not clips or any(not clip for clip in clips):
+        return None
+    if len(clips) == 1:
+        return clips[0]
+    kinds = {sniff_extension(clip) for clip in clips}
+    if kinds == {"wav"}:
+        parsed = [parse_wav(clip) for clip in clips]
+        if any(p is None for p in parsed) or len({rate for _, rate in parsed}) != 1:
+            return None
+        rate = parsed[0][1]
+        return encode_pcm_wav(join_pcm([pcm for pcm, _ in parsed], rate), rate)
+    if kinds == {"mp3"}:
+        return join_mp3(clips)
+    logger.warning(f"Can't join chunks of mixed formats {sorted(kinds)}.")
+    return None
@@ -0,0 +1,168 @@
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from typing import Optional, Dict, List, Callable, Awaitable, Any
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Priority classes (lower runs first)
+PRIORITY_SITREP = 0
+PRIORITY_COMMAND = 1
+PRIORITY_NAMES = {PRIORITY_SITREP: "sitrep", PRIORITY_COMMAND: "command"}
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_DEPTH = 32
+
+
+class AudioJob:
+    def __init__(self, seq: int, priority: int, fn: Callable[..., Awaitable[Any]], args: tuple, kwargs: dict,
+                 on_drop: Optional[Callable[[], None]] = None):
+        self.seq = seq
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.on_drop = on_drop
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "AudioJob"):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class AudioJobQueue:
+    """
+    Bounded, prioritized queue of audio jobs served by a fixed pool of async workers.
+
+    A job is superseded once a newer job of the same or higher priority has been submitted:
+    its audio would only overwrite something fresher on the console. Superseded jobs are dropped
+    when dequeued, and jobs told `is_current()` is False should skip publishing their result.
+    A dropped job's `fn` never runs; its `on_drop` callback (if any) is called instead.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_depth: int = DEFAULT_MAX_DEPTH, tags: Optional[List[str]] = None):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.tags = ["service:sentinel-ai"] + (tags or [])
+        self._heap: List[AudioJob] = []
+        self._seq = itertools.count(1)
+        self._latest_by_priority: Dict[int, int] = {}
+        self._not_empty: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._active = 0
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self._tasks:
+            return
+        self._not_empty = asyncio.Event()
+        if self._heap:
+            self._not_empty.set()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.debug(f"Audio job queue started ({self.workers} workers, max depth {self.max_depth}, tags {self.tags}).")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._heap:
+            self._drop(heapq.heappop(self._heap), "stopped")
+
+    # --- Submission ---
+
+    def submit(self, fn: Callable[..., Awaitable[Any]], *args, priority: int = PRIORITY_COMMAND,
+               on_drop: Optional[Callable[[], None]] = None, **kwargs) -> Optional[AudioJob]:
+        """
+        Queues `fn(*args, is_current=..., **kwargs)`. Returns None if the job was rejected.
+        `on_drop()` is called if the job is dropped without running (rejected, shed or superseded).
+        """
+        job = AudioJob(next(self._seq), priority, fn, args, kwargs, on_drop)
+        self._latest_by_priority[priority] = job.seq
+
+        if len(self._heap) >= self.max_depth:
+            # Full: shed the least important, oldest job (possibly the new one)
+            worst = max(self._heap, key=lambda j: (j.priority, -j.seq))
+            if (worst.priority, -worst.seq) < (job.priority, -job.seq):
+                self._drop(job, "full")
+                return None
+            self._heap.remove(worst)
+            heapq.heapify(self._heap)
+            self._drop(worst, "full")
+
+        heapq.heappush(self._heap, job)
+        if self._not_empty is not None:
+            self._not_empty.set()
+        self._gauge_depth()
+        return job
+
+    def is_current(self, job: AudioJob) -> bool:
+        return not any(
+            seq > job.seq for priority, seq in self._latest_by_priority.items() if priority <= job.priority
+        )
+
+    @property
+    def depth(self) -> int:
+        return len(self._heap)
+
+    @property
+    def idle(self) -> bool:
+        """Nothing queued and no job in progress."""
+        return not self._heap and not self._active
+
+    # --- Workers ---
+
+    async def _worker(self, worker_id: int):
+        while True:
+            while not self._heap:
+                self._not_empty.clear()
+                await self._not_empty.wait()
+
+            job = heapq.heappop(self._heap)
+            self._gauge_depth()
+
+            if not self.is_current(job):
+                self._drop(job, "superseded")
+                continue
+
+            wait = time.monotonic() - job.enqueued_at
+            tags = self.tags + [f"priority:{PRIORITY_NAMES.get(job.priority, job.priority)}"]
+            try:
+                metrics.gauge('echo_ops.audio.queue.wait', wait, tags=tags)
+            except Exception:
+                pass
+
+            self._active += 1
+            try:
+                await job.fn(*job.args, is_current=lambda: self.is_current(job), **job.kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Audio job {job.seq} failed: {e}")
+            finally:
+                self._active -= 1
+
+    def _drop(self, job: AudioJob, reason: str):
+        logger.info(f"Dropping audio job {job.seq} ({PRIORITY_NAMES.get(job.priority, job.priority)}): {reason}")
+        try:
+            metrics.increment('echo_ops.audio.queue.dropped', tags=self.tags + [
+                f"reason:{reason}", f"priority:{PRIORITY_NAMES.get(job.priority, job.priority)}"
+            ])
+        except Exception:
+            pass
+        if job.on_drop is not None:
+            try:
+                job.on_drop()
+            except Exception as e:
+                logger.error(f"Audio job {job.seq} drop callback failed: {e}")
+
+    def _gauge_depth(self):
+        try:
+            metrics.gauge('echo_ops.audio.queue.depth', len(self._heap), tags=self.tags)
+        except Exception:
+            pass
+
@@ -0,0 +1,217 @@
+import os
+import re
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.join(".cache", "audio")
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024   # 50 MB
+DEFAULT_MAX_AGE_SECONDS = 3600         # Clips are only useful while an incident is live
+
+# extension -> content type
+CONTENT_TYPES = {
+    "wav": "audio/wav",
+    "mp3": "audio/mpeg",
+    "ogg": "audio/ogg",
+    "bin": "application/octet-stream",
+}
+
+_CLIP_ID = re.compile(r"^[0-9a-f]{32}$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def sniff_extension(audio: bytes) -> str:
+    """Container format from magic bytes (ElevenLabs returns MP3, Gemini is wrapped in WAV)."""
+    if audio[:4] == b"RIFF" and audio[8:12] == b"WAVE":
+        return "wav"
+    if audio[:3] == b"ID3" or (len(audio) > 1 and audio[0] == 0xFF and (audio[1] & 0xE0) == 0xE0):
+        return "mp3"
+    if audio[:4] == b"OggS":
+        return "ogg"
+    return "bin"
+
+
+def record_audio_bytes(stage: str, ext: str, nbytes: int):
+    """Audio volume by stage (`disk` when stored, `wire` when sent to a console) and format."""
+    try:
+        metrics.increment('echo_ops.audio.bytes', nbytes, tags=["service:sentinel-ai", f"stage:{stage}", f"format:{ext}"])
+    except Exception:
+        pass
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Single-range `Range: bytes=a-b` -> inclusive (start, end).
+    Returns None for malformed or unsatisfiable ranges.
+    """
+    m = _RANGE.match(header.strip())
+    if not m or size == 0:
+        return None
+    start_s, end_s = m.groups()
+    if not start_s and not end_s:
+        return None
+    if not start_s:
+        # Suffix range: last N bytes
+        length = int(end_s)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class Clip:
+    def __init__(self, clip_id: str, ext: str, size: int, etag: str, created_at: float):
+        self.clip_id = clip_id
+        self.ext = ext
+        self.size = size
+        self.etag = etag
+        self.created_at = created_at
+        self.bytes_sent = 0
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES.get(self.ext, "application/octet-stream")
+
+    @property
+    def url(self) -> str:
+        return f"/audio/{self.clip_id}"
+
+
+class AudioStore:
+    """
+    Generated clips on disk under collision-free IDs, evicted by total size and age.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._clips: "OrderedDict[str, Clip]" = OrderedDict()  # oldest first
+        self._bytes = 0
+        self._bytes_sent = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, clip: Clip) -> str:
+        return os.path.join(self.directory, f"{clip.clip_id}.{clip.ext}")
+
+    def _load_index(self):
+        found = []
+        for name in os.listdir(self.directory):
+            clip_id, _, ext = name.partition(".")
+            if not _CLIP_ID.match(clip_id) or ext not in CONTENT_TYPES:
+                continue
+            path = os.path.join(self.directory, name)
+            st = os.stat(path)
+            with open(path, "rb") as f:
+                etag = hashlib.sha1(f.read()).hexdigest()
+            found.append(Clip(clip_id, ext, st.st_size, etag, st.st_mtime))
+        for clip in sorted(found, key=lambda c: c.created_at):
+            self._clips[clip.clip_id] = clip
+            self._bytes += clip.size
+        self._evict()
+
+    def save(self, audio: bytes) -> Clip:
+        clip = Clip(uuid.uuid4().hex, sniff_extension(audio), len(audio), hashlib.sha1(audio).hexdigest(), time.time())
+        path = self._path(clip)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._clips[clip.clip_id] = clip
+            self._bytes += clip.size
+            self._evict()
+        try:
+            metrics.gauge('echo_ops.audio.store.bytes', self._bytes, tags=["service:sentinel-ai"])
+            metrics.gauge('echo_ops.audio.clip.bytes', clip.size, tags=["service:sentinel-ai", f"format:{clip.ext}"])
+        except Exception:
+            pass
+        record_audio_bytes("disk", clip.ext, clip.size)
+        return clip
+
+    def get(self, clip_id: str) -> Optional[Clip]:
+        if not _CLIP_ID.match(clip_id):
+            return None
+        with self._lock:
+            clip = self._clips.get(clip_id)
+        if clip is None:
+            # Saved by another worker process sharing this directory
+            clip = self._adopt(clip_id)
+        if clip and time.time() - clip.created_at > self.max_age_seconds:
+            return None
+        return clip
+
+    def _adopt(self, clip_id: str) -> Optional[Clip]:
+        for ext in CONTENT_TYPES:
+            path = os.path.join(self.directory, f"{clip_id}.{ext}")
+            try:
+                st = os.stat(path)
+                with open(path, "rb") as f:
+                    etag = hashlib.sha1(f.read()).hexdigest()
+            except OSError:
+                continue
+            clip = Clip(clip_id, ext, st.st_size, etag, st.st_mtime)
+            with self._lock:
+                if clip_id not in self._clips:
+                    self._clips[clip_id] = clip
+                    self._bytes += clip.size
+                return self._clips[clip_id]
+        return None
+
+    def read(self, clip: Clip, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Bytes [start, end] inclusive."""
+        end = clip.size - 1 if end is None else end
+        with open(self._path(clip), "rb") as f:
+            f.seek(start)
+            return f.read(end - start + 1)
+
+    def record_sent(self, clip: Clip, nbytes: int):
+        """Counts bytes of `clip` served to a console."""
+        with self._lock:
+            clip.bytes_sent += nbytes
+            self._bytes_sent += nbytes
+        record_audio_bytes("wire", clip.ext, nbytes)
+
+    def _evict(self):
+        now = time.time()
+        while self._clips:
+            clip = next(iter(self._clips.values()))
+            if self._bytes <= self.max_bytes and now - clip.created_at <= self.max_age_seconds:
+                break
+            del self._clips[clip.clip_id]
+            self._bytes -= clip.size
+            try:
+                os.remove(self._path(clip))
+            except OSError:
+                pass
+            try:
+                metrics.increment('echo_ops.audio.store.eviction', tags=["service:sentinel-ai"])
+            except Exception:
+                pass
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"clips": len(self._clips), "bytes": self._bytes, "bytes_sent": self._bytes_sent}
+
+
+audio_store = AudioStore(
+    directory=os.getenv("AUDIO_STORE_DIR", DEFAULT_DIR),
+    max_bytes=int(os.getenv("AUDIO_STORE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+    max_age_seconds=float(os.getenv("AUDIO_STORE_MAX_AGE_SECONDS", DEFAULT_MAX_AGE_SECONDS)),
+)
@@ -0,0 +1,303 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from typing import Optional, Dict, List, AsyncIterator
+
+from metrics import metrics
+
+from audio_encoder import audio_encoder, parse_wav
+from audio_store import sniff_extension, CONTENT_TYPES
+from voice_handler import (
+    astream_voice, asynthesize_voice, finalize_stream, store_cached_voice, stream_media_type,
+    wav_stream_header, DEFAULT_VOICE_ID,
+)
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs stay replayable for this long (seconds)
+JOB_TTL_SECONDS = 300
+MAX_JOBS = 64
+# Sentences of one pipelined clip synthesized at once
+PIPELINE_TTS_CONCURRENCY = int(os.getenv("SITREP_PIPELINE_TTS_CONCURRENCY", "3"))
+# Jobs live in the process that started them, so /audio/stream/{job_id} only resolves there.
+# With several workers behind one port a console may reach another one: streaming is off then.
+STREAMS_AVAILABLE = int(os.getenv("WEB_CONCURRENCY", "1")) <= 1
+
+
+class StreamJob:
+    """
+    One streamed TTS clip.
+    The producer appends provider chunks; any number of listeners replay them from the start
+    and then follow live until the provider finishes.
+    """
+
+    def __init__(self, text: str, voice_id: str, provider: Optional[str]):
+        self.job_id = uuid.uuid4().hex
+        self.text = text
+        self.voice_id = voice_id
+        self.provider = provider
+        self.media_type: Optional[str] = None
+        self.chunks: List[bytes] = []
+        self.done = False
+        self.created_at = time.time()
+        self.first_byte_at: Optional[float] = None
+        self._signal = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _notify(self):
+        signal, self._signal = self._signal, asyncio.Event()
+        signal.set()
+
+    @property
+    def url(self) -> str:
+        return f"/audio/stream/{self.job_id}"
+
+    def _append(self, chunk: bytes, source: str, media_type: str):
+        if self.first_byte_at is None:
+            self.first_byte_at = time.time()
+            self.media_type = media_type
+            ttfb = self.first_byte_at - self.created_at
+            metrics.gauge('echo_ops.tts.stream.ttfb', ttfb, tags=["service:sentinel-ai", f"provider:{source}"])
+            logger.info(f"Stream {self.job_id}: first audio byte after {ttfb:.3f}s ({source}).")
+        self.chunks.append(chunk)
+        self._notify()
+
+    async def run(self):
+        source = None
+        try:
+            async for source, chunk in astream_voice(self.text, self.voice_id, self.provider):
+                self._append(chunk, source, stream_media_type(source))
+        except Exception as e:
+            logger.error(f"Stream {self.job_id} failed: {e}")
+        finally:
+            self.done = True
+            self._notify()
+
+        if self.chunks:
+            audio = await audio_encoder.aencode(finalize_stream(source, b"".join(self.chunks)))
+            store_cached_voice(self.text, audio, self.voice_id, source)
+            metrics.gauge('echo_ops.tts.stream.duration', time.time() - self.created_at,
+                         tags=["service:sentinel-ai", f"provider:{source}"])
+
+    async def wait_started(self):
+        """Blocks until the first chunk is available or the job ended without audio."""
+        while not self.chunks and not self.done:
+            await self._signal.wait()
+
+    async def wait_done(self):
+        """Blocks until the provider has finished (or failed)."""
+        while not self.done:
+            await self._signal.wait()
+
+    async def wait_text(self, timeout: float) -> bool:
+        """Blocks until `text` is final (False on timeout). A plain job's text is known upfront."""
+        return True
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        idx = 0
+        while True:
+            signal = self._signal
+            while idx < len(self.chunks):
+                yield self.chunks[idx]
+                idx += 1
+            if self.done:
+                return
+            await signal.wait()
+
+
+_jobs: Dict[str, StreamJob] = {}
+
+
+def _prune() -> bool:
+    """
+    Drops expired jobs, then finished ones (oldest first) while at MAX_JOBS.
+    Jobs still synthesizing are never evicted; returns False if every slot is taken by one.
+    """
+    now = time.time()
+    for job_id in [j for j, job in _jobs.items() if job.done and now - job.created_at > JOB_TTL_SECONDS]:
+        del _jobs[job_id]
+    excess = len(_jobs) - MAX_JOBS + 1
+    if excess > 0:
+        # Dicts keep insertion order, so this is oldest first
+        for job_id in [j for j, job in _jobs.items() if job.done][:excess]:
+            del _jobs[job_id]
+    return len(_jobs) < MAX_JOBS
+
+
+def _admit_job() -> bool:
+    if _prune():
+        return True
+    logger.warning(f"All {MAX_JOBS} stream slots are live. Not starting another stream.")
+    try:
+        metrics.increment('echo_ops.tts.stream.rejected', tags=["service:sentinel-ai"])
+    except Exception:
+        pass
+    return False
+
+
+class PipelinedStreamJob(StreamJob):
+    """
+    A streamed clip whose text arrives sentence by sentence (see sitrep_pipeline).
+    Each fed sentence is synthesized as soon as it arrives (several at once), and the clips are
+    appended in feed order as one continuous stream: MP3 clips back to back, WAV clips as
+    PCM under a single open-ended header.
+    Sentences can be fed before `run()` starts; `discard()` ends a job that will never run.
+    """
+
+    def __init__(self, voice_id: str, provider: Optional[str], started_at: Optional[float] = None):
+        super().__init__("", voice_id, provider)
+        self.started_at = started_at or self.created_at
+        self.sentences: List[str] = []
+        self._feed: asyncio.Queue = asyncio.Queue()
+        self._format: Optional[tuple] = None  # ("mp3",) or ("wav", sample_rate)
+        self._sources: set = set()  # Providers that produced the appended sentences
+        self._text_final = asyncio.Event()
+        self._discarded = False
+
+    def feed(self, sentence: str):
+        self.sentences.append(sentence)
+        self.text = " ".join(self.sentences)
+        if not self._discarded:
+            self._feed.put_nowait(sentence)
+
+    def close(self):
+        """No more sentences: `text` is final and run() finishes once the last one is appended."""
+        self._feed.put_nowait(None)
+        self._text_final.set()
+
+    def discard(self):
+        """Ends the job without audio (superseded, or never queued); later sentences only extend `text`."""
+        self._discarded = True
+        self._feed.put_nowait(None)
+        self.done = True
+        self._notify()
+
+    @property
+    def discarded(self) -> bool:
+        return self._discarded
+
+    async def wait_text(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._text_final.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def run(self):
+        limit = asyncio.Semaphore(PIPELINE_TTS_CONCURRENCY)
+        ordered: asyncio.Queue = asyncio.Queue()
+
+        async def synthesize(sentence: str):
+            async with limit:
+                return await asynthesize_voice(sentence, self.voice_id, self.provider)
+
+        async def schedule():
+            while True:
+                sentence = await self._feed.get()
+                if sentence is None or self._discarded:
+                    break
+                ordered.put_nowait(asyncio.create_task(synthesize(sentence)))
+            ordered.put_nowait(None)
+
+        scheduler = asyncio.create_task(schedule())
+        try:
+            while True:
+                task = await ordered.get()
+                if task is None or self._discarded:
+                    break
+                source, audio = await task
+                piece = self._piece(audio)
+                if piece:
+                    if self.first_byte_at is None:
+                        self._record_first_audio()
+                    self._sources.add(source)
+                    self._append(piece, source or "mixed", self.media_type or self._media_type())
+        except Exception as e:
+            logger.error(f"Stream {self.job_id} failed: {e}")
+        finally:
+            scheduler.cancel()
+            while not ordered.empty():
+                task = ordered.get_nowait()
+                if task is not None:
+                    task.cancel()
+            self.done = True
+            self._notify()
+
+        if self.chunks and not self._discarded:
+            audio = await audio_encoder.aencode(finalize_stream(None, b"".join(self.chunks)))
+            if len(self._sources) == 1 and len(self.chunks) == len(self.sentences):
+                store_cached_voice(self.text, audio, self.voice_id, next(iter(self._sources)))
+            metrics.gauge('echo_ops.tts.stream.duration', time.time() - self.created_at,
+                          tags=["service:sentinel-ai", "mode:pipelined"])
+
+    def _piece(self, audio: Optional[bytes]) -> Optional[bytes]:
+        """Stream bytes for one sentence's clip, or None if it can't join this stream."""
+        if not audio:
+            return None
+        ext = sniff_extension(audio)
+        if ext == "wav":
+            parsed = parse_wav(audio)
+            if parsed is None:
+                return None
+            pcm, rate = parsed
+            if self._format is None:
+                self._format = ("wav", rate)
+                return wav_stream_header(rate) + pcm
+            if self._format == ("wav", rate):
+                return pcm
+        elif ext == "mp3":
+            if self._format is None:
+                self._format = ("mp3",)
+            if self._format == ("mp3",):
+                return audio
+        # A fallback provider answered in a different format than the stream started with
+        logger.warning(f"Stream {self.job_id}: dropping a {ext} segment that doesn't match {self._format}.")
+        try:
+            metrics.increment('echo_ops.sitrep.pipeline.dropped_segment', tags=["service:sentinel-ai", f"format:{ext}"])
+        except Exception:
+            pass
+        return None
+
+    def _media_type(self) -> str:
+        return CONTENT_TYPES["wav" if self._format and self._format[0] == "wav" else "mp3"]
+
+    def _record_first_audio(self):
+        latency = time.time() - self.started_at
+        logger.info(f"Stream {self.job_id}: first sentence audible {latency:.3f}s after the alert.")
+        try:
+            metrics.gauge('echo_ops.sitrep.time_to_first_audio', latency, tags=["service:sentinel-ai", "mode:pipelined"])
+        except Exception:
+            pass
+
+
+def start_stream_job(text: str, voice_id: str = DEFAULT_VOICE_ID, provider: Optional[str] = None) -> Optional[StreamJob]:
+    """
+    Registers a job and starts pulling from the provider in the background.
+    Returns None if MAX_JOBS streams are already in flight.
+    """
+    if not _admit_job():
+        return None
+    job = StreamJob(text, voice_id, provider)
+    _jobs[job.job_id] = job
+    job._task = asyncio.create_task(job.run())
+    return job
+
+
+def register_pipelined_job(voice_id: str = DEFAULT_VOICE_ID, provider: Optional[str] = None,
+                           started_at: Optional[float] = None) -> Optional[PipelinedStreamJob]:
+    """
+    Registers a sentence-fed job; call `feed(sentence)` as text arrives and `close()` at the end.
+    The job is not started: its audio job awaits `run()` (or calls `discard()`).
+    Returns None if MAX_JOBS streams are already in flight.
+    """
+    if not _admit_job():
+        return None
+    job = PipelinedStreamJob(voice_id, provider, started_at)
+    _jobs[job.job_id] = job
+    return job
+
+
+def get_stream_job(job_id: str) -> Optional[StreamJob]:
+    return _jobs.get(job_id)
@@ -4,33 +4,60 @@ import json
 import time
 import asyncio
 import random
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
+import importlib
+import threading
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse, Response, JSONResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 
 from dotenv import load_dotenv
 
-# Trace everything!
-from ddtrace import patch_all, tracer
-patch_all()
-
-from datadog import initialize, statsd
-
-# Initialize Datadog (relies on DD_AGENT_HOST/DD_API_KEY env vars or defaults)
-initialize()
-
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.output_parsers import StrOutputParser
-
-# Import our Prompts and Handlers
-from prompts import sitrep_prompt, intent_prompt
-from voice_handler import generate_voice
-from textblob import TextBlob
-
-# Load Env
+# Load Env (first, so STARTUP_MODE and provider settings from .env apply to the imports below)
 load_dotenv()
 
+from startup import startup, ddtrace_bootstrapped, LAZY_IMPORTS
+
+# Trace everything! (`ddtrace-run` has already patched at interpreter start)
+with startup.timed_import("ddtrace"):
+    from ddtrace import patch_all, tracer
+    if not ddtrace_bootstrapped():
+        patch_all()
+
+with startup.timed_import("datadog"):
+    from datadog import initialize
+
+    # Initialize Datadog (relies on DD_AGENT_HOST/DD_API_KEY env vars or defaults)
+    initialize()
+
+# LangChain and the prompts built on it are imported on first use in lazy startup mode
+if not LAZY_IMPORTS:
+    with startup.timed_import("langchain"):
+        from langchain_google_genai import ChatGoogleGenerativeAI  # noqa: F401
+        from langchain_core.output_parsers import StrOutputParser  # noqa: F401
+        import prompts  # noqa: F401
+
+# Import our Handlers
+from voice_handler import agenerate_voice_cached, peek_cached_voice, close_clients, warm_connections
+from audio_stream import start_stream_job, register_pipelined_job, get_stream_job, STREAMS_AVAILABLE
+from sitrep_pipeline import SITREP_PIPELINE, astream_sentences
+from audio_store import audio_store, parse_range, record_audio_bytes, CONTENT_TYPES
+from audio_encoder import audio_encoder
+from provider_health import provider_registry
+from metrics import metrics, record_llm_usage
+from shared_state import shared_state
+from intent_parser import fast_path_intent, record_llm_latency
+from intent_cache import intent_cache
+from alert_coalescer import alert_coalescer
+from alert_batcher import alert_batcher, alert_group, group_alerts
+from audio_queue import PRIORITY_SITREP, PRIORITY_COMMAND
+from rooms import rooms, DEFAULT_ROOM
+from audio_cache import get_audio_cache
+from sentiment import sentiment_scorer
+from log_context import log_context
+from stub_providers import STUB_PROVIDERS, PROVIDER_MODE, build_stub_llm
+
 # Configure Logging (Datadog Friendly)
 logging.basicConfig(
     level=logging.INFO,
@@ -46,28 +73,74 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 @app.on_event("startup")
 async def startup_event():
-    """Ensure status.json exists on startup to prevent 404s."""
-    status_path = os.path.join("static", "status.json")
-    if not os.path.exists(status_path):
-        with open(status_path, "w") as f:
-            json.dump({
-                "text": "Waiting for Signal...",
-                "audio_available": False,
-                "timestamp": str(time.time())
-            }, f)
-        logger.info("Created default status.json")
+    """Ensure status.json exists on startup to prevent 404s, and seed the default room's status."""
+    rooms.start()
+    metrics.start()
+    sentiment_scorer.start()
+    log_context.start()
+    # Pre-warm in the background so the port opens immediately; /ready reports completion
+    startup.start_warmup([
+        ("llm", warm_llm),
+        ("tts", warm_connections),
+        ("sentiment", sentiment_scorer.wait_warm),
+    ])
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled TTS connections."""
+    await startup.stop()
+    await rooms.stop()
+    await log_context.stop()
+    await close_clients()
+    sentiment_scorer.stop()
+    await metrics.stop()
 
 # Initialize Gemini
-try:
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash-lite", # Using Flash Lite as requested
-        temperature=0.1,
-        max_retries=2
-    )
-    logger.info("EchoOps Intelligence Layer (Gemini) Initialized.")
-except Exception as e:
-    logger.error(f"Failed to initialize Gemini: {e}")
-    llm = None
+LLM_MODEL = "gemini-2.5-flash-lite" # Using Flash Lite as requested
+
+# Warm up with a one-token call so the LLM's connection is open before the first alert (costs a few tokens)
+WARMUP_LLM_PING = os.getenv("WARMUP_LLM_PING", "false").lower().strip() in ("true", "1", "yes")
+
+_llm = None
+_llm_initialized = False
+_llm_lock = threading.Lock()
+
+def get_llm():
+    """The shared Gemini chat model, built on first use (None if it failed to initialize)."""
+    global _llm, _llm_initialized
+    with _llm_lock:
+        if not _llm_initialized:
+            try:
+                if STUB_PROVIDERS:
+                    # Offline stand-in (PROVIDER_MODE=stub) for benchmarks and regression runs
+                    _llm = build_stub_llm()
+                else:
+                    with startup.timed_import("langchain"):
+                        from langchain_google_genai import ChatGoogleGenerativeAI
+                    _llm = ChatGoogleGenerativeAI(
+                        model=LLM_MODEL,
+                        temperature=0.1,
+                        max_retries=2
+                    )
+                    logger.info("EchoOps Intelligence Layer (Gemini) Initialized.")
+            except Exception as e:
+                logger.error(f"Failed to initialize Gemini: {e}")
+                _llm = None
+            _llm_initialized = True
+        return _llm
+
+async def warm_llm():
+    """Imports LangChain and the prompts, builds the model, and optionally opens its connection."""
+    llm = await asyncio.to_thread(get_llm)
+    if llm is None:
+        raise RuntimeError("LLM not available")
+    with startup.timed_import("prompts"):
+        await asyncio.to_thread(importlib.import_module, "prompts")
+    if WARMUP_LLM_PING:
+        await llm.ainvoke("ping")
+
+if not LAZY_IMPORTS:
+    get_llm()
 
 # --- Models ---
 class DatadogWebhookPayload(BaseModel):
@@ -80,6 +153,7 @@ class DatadogWebhookPayload(BaseModel):
 class VoiceCommand(BaseModel):
     transcript: str
     user_id: str
+    room: Optional[str] = None
 
 # --- Endpoints ---
 
@@ -87,77 +161,351 @@ class VoiceCommand(BaseModel):
 def health_check():
     return {"status": "operational", "system": "EchoOps"}
 
+@app.get("/ready")
+def readiness_check():
+    """
+    Readiness (vs. /health liveness): 200 once background warmup has finished, 503 before.
+    Includes per-module import and per-stage warmup timings.
+    """
+    snapshot = startup.snapshot()
+    if not snapshot["ready"]:
+        return Response(content=json.dumps(snapshot), status_code=503, media_type="application/json")
+    return snapshot
+
+def get_room(room_id: Optional[str]):
+    try:
+        return rooms.get(room_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Seconds between SSE keep-alive comments (keeps proxies from closing idle streams)
+SSE_HEARTBEAT_SECONDS = 15
+
+@app.get("/status/stream")
+async def status_stream(request: Request, room: Optional[str] = None):
+    """
+    Server-sent events feed of one room's dashboard status.
+    Sends the current status on connect, then every update as it is published.
+    """
+    broadcaster = get_room(room).broadcaster
+    queue = broadcaster.subscribe()
+
+    async def event_source():
+        try:
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    status = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(status)}\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+    )
+
+# Upper bound on how long `/status?since=` holds a request open (seconds)
+STATUS_LONG_POLL_MAX_SECONDS = 30
+
+@app.get("/status")
+async def get_status(request: Request, since: Optional[int] = None, wait: float = 25.0, room: Optional[str] = None):
+    """
+    Versioned dashboard status of one room (the default room unless `room` is given).
+    Without `since`: the latest status, with an ETag (If-None-Match -> 304).
+    With `since=<version>`: every update after that version, held open up to `wait` seconds
+    until one arrives (304 if none did). `reset` is set when updates were missed and the
+    client should treat the last event as a fresh baseline.
+    """
+    broadcaster = get_room(room).broadcaster
+    if since is None:
+        etag = f'"{broadcaster.version}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return JSONResponse({"version": broadcaster.version, "status": broadcaster.latest}, headers={"ETag": etag})
+
+    if since > broadcaster.version:
+        # Client's version is from a different state store (e.g. it was reset); resync
+        since = 0
+    elif since == broadcaster.version:
+        await broadcaster.wait_for_update(since, min(max(wait, 0.0), STATUS_LONG_POLL_MAX_SECONDS))
+
+    events, complete = broadcaster.events_since(since)
+    etag = f'"{broadcaster.version}"'
+    if not events:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse({
+        "version": broadcaster.version,
+        "events": [{"version": v, "status": status} for v, status in events],
+        "reset": not complete,
+    }, headers={"ETag": etag, "Cache-Control": "no-store"})
+
 @app.post("/webhook/datadog")
-async def datadog_webhook(payload: dict, background_tasks: BackgroundTasks):
+async def datadog_webhook(payload: dict):
     """
     Receives alerts from Datadog.
     1. Extracts context.
-    2. Fetches dummy logs (Simulated for this hackathon demo).
+    2. Looks up relevant recent logs.
     3. Generates SitRep via Gemini.
     4. Generates Audio via ElevenLabs.
+
+    Correlated alerts (same room and service/team) arriving within ALERT_GATHER_SECONDS of
+    each other share one multi-alert SitRep instead of each getting their own.
     """
     span = tracer.current_span()
     if span:
         span.set_tag("event.type", "alert_ingest")
     
+    received_at = time.time()
     logger.info(f"Received Alert Payload: {payload}")
-    
-    # 1. Extract Context
-    # Handle different payload structures if necessary
-    alert_title = payload.get("event_title", payload.get("title", "Unknown Alert"))
-    alert_body = payload.get("body", payload.get("message", ""))
-    
-    # 2. Simulate Log Fetching (In a real app, we'd query the DD Log Search API here)
-    simulated_logs = "TIMESTAMP=2024-12-22T10:00:01 ERROR Component=PaymentGateway Message='Connection Refused: 502 Bad Gateway'\nTIMESTAMP=2024-12-22T10:00:02 WARN Component=CheckoutService Message='Retrying transaction...'"
-    
-    if "latency" in str(alert_title).lower():
-        simulated_logs += "\nTIMESTAMP=2024-12-22T10:00:05 ERROR Component=DB_Pool Message='Timeout waiting for connection'"
 
-    logger.info("Context extracted. Analyzing with Gemini...")
-
-    sitrep_script = "Analysis failed."
-    audio_path = None
+    # Route to the incident's war room (payload `room`, `room:` tag or ROOM_ROUTES rule)
+    room = rooms.get(rooms.route_alert(payload))
+    group = alert_group(payload)
+    if span:
+        span.set_tag("room", room.room_id)
+        span.set_tag("alert.group", group)
 
-    # 3. Generate SitRep
+    llm = get_llm()
     if llm:
-        try:
-            chain = sitrep_prompt | llm | StrOutputParser()
-            sitrep_script = await chain.ainvoke({
-                "alert_title": alert_title,
-                "alert_query": payload.get("alert_query", "N/A"),
-                "log_snippets": simulated_logs
-            })
-            
-            logger.info(f"Generated SitRep: {sitrep_script}")
-            
-            # 4. Generate Voice (Enabled)
-            from voice_handler import FEMALE_VOICE_ID
-            voice_provider = os.getenv("SITREPS_VOICE_PROVIDER", os.getenv("VOICE_PROVIDER", "elevenlabs"))
-            background_tasks.add_task(generate_command_audio, sitrep_script, FEMALE_VOICE_ID, voice_provider)
+        async def build_sitrep():
+            return await alert_batcher.submit(
+                (room.room_id, group), payload,
+                lambda alerts: sitrep_for_alerts(llm, room, alerts, received_at)
+            )
 
-            
-            # Write Initial Status (Before audio is ready)
-            import json
-            status_data = {
-                "text": sitrep_script, # Display text immediately
-                "audio_available": False, 
-                "timestamp": str(payload.get("timestamp", "now"))
-            }
-            with open(os.path.join("static", "status.json"), "w") as f:
-                json.dump(status_data, f)
+        try:
+            # Re-deliveries of a flapping monitor reuse the first delivery's SitRep and audio
+            result, duplicate = await alert_coalescer.run(payload, build_sitrep)
+            if duplicate:
+                return {**result, "audio_queued": False, "deduplicated": True}
+            return result
 
-            return {
-                "status": "processed", 
-                "sitrep": sitrep_script,
-                "audio_queued": True
-            }
-            
         except Exception as e:
             logger.error(f"Processing Failed: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     else:
         return {"status": "error", "message": "LLM not available"}
 
+@app.post("/webhook/datadog/batch")
+async def datadog_webhook_batch(request: Request):
+    """
+    Receives several alerts at once (a JSON list, or {"alerts": [...]}).
+    Alerts are grouped by room and service/team; each group gets one SitRep.
+    Groups succeed or fail independently: if only some fail, the response is a 207 listing
+    each group's outcome, so the sender retries just the failed ones (the rest are already spoken).
+    """
+    span = tracer.current_span()
+    if span:
+        span.set_tag("event.type", "alert_ingest_batch")
+
+    received_at = time.time()
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON")
+    payloads = body.get("alerts") if isinstance(body, dict) else body
+    if not isinstance(payloads, list) or not all(isinstance(p, dict) for p in payloads):
+        raise HTTPException(status_code=400, detail="Expected a list of alert payloads")
+    logger.info(f"Received Alert Batch: {len(payloads)} alerts")
+
+    groups = group_alerts(payloads, rooms.route_alert)
+    if span:
+        span.set_tag("alert.groups", len(groups))
+
+    llm = get_llm()
+    if not llm:
+        return {"status": "error", "message": "LLM not available"}
+
+    results = await asyncio.gather(*(
+        sitrep_for_alerts(llm, rooms.get(room_id), alerts, received_at)
+        for (room_id, _), alerts in groups.items()
+    ), return_exceptions=True)
+
+    group_results = []
+    failed = 0
+    for ((room_id, group), alerts), result in zip(groups.items(), results):
+        entry = {"room": room_id, "group": group, "alerts": len(alerts)}
+        if isinstance(result, BaseException):
+            logger.error(f"Batch Processing Failed for {room_id}/{group}: {result}")
+            failed += 1
+            entry.update({"status": "error", "error": str(result)})
+        else:
+            entry.update({"status": "processed", "sitrep": result["sitrep"]})
+        group_results.append(entry)
+
+    if groups and failed == len(groups):
+        # Nothing was published, so a retry of the whole batch is safe
+        raise HTTPException(status_code=500, detail=group_results[0]["error"])
+
+    response = {
+        "status": "partial" if failed else "processed",
+        "alerts": sum(len(alerts) for alerts in groups.values()),
+        "groups": group_results
+    }
+    return JSONResponse(response, status_code=207) if failed else response
+
+def _alert_title(payload: dict) -> str:
+    return payload.get("event_title", payload.get("title", "Unknown Alert"))
+
+def _alert_line(title: str, payload: dict) -> str:
+    body = payload.get("body", payload.get("message", ""))
+    return f"{title}: {body}" if body else title
+
+async def sitrep_for_alerts(llm, room, payloads: list, received_at: float) -> dict:
+    """
+    Builds one SitRep for `payloads` (a single alert, or a group of correlated ones),
+    queues its audio in `room` and publishes it to the room's consoles.
+    """
+    from langchain_core.output_parsers import StrOutputParser
+    from prompts import sitrep_prompt, multi_sitrep_prompt
+
+    # 1. Extract Context
+    # Handle different payload structures if necessary
+    titles = [_alert_title(p) for p in payloads]
+
+    # 2. Fetch Log Context (indexed lookup over recent logs; canned demo lines if no backend is configured)
+    snippets = await asyncio.gather(*(log_context.context_for(p) for p in payloads))
+    log_snippets = "\n".join(dict.fromkeys(s for s in snippets if s))
+
+    logger.info("Context extracted. Analyzing with Gemini...")
+
+    # 3. Generate SitRep
+    if len(payloads) == 1:
+        chain = sitrep_prompt | llm
+        sitrep_inputs = {
+            "alert_title": titles[0],
+            "alert_query": payloads[0].get("alert_query", "N/A"),
+            "log_snippets": log_snippets
+        }
+    else:
+        chain = multi_sitrep_prompt | llm
+        sitrep_inputs = {
+            "alert_title": f"{len(payloads)} correlated alerts: " + "; ".join(titles),
+            "alert_list": "\n".join(
+                f"    {i}. {_alert_line(title, p)}" for i, (title, p) in enumerate(zip(titles, payloads), 1)
+            ),
+            "alert_query": "; ".join(dict.fromkeys(p["alert_query"] for p in payloads if p.get("alert_query"))) or "N/A",
+            "log_snippets": log_snippets
+        }
+    batch_info = {"alerts": len(payloads), "batched": True} if len(payloads) > 1 else {}
+
+    from voice_handler import FEMALE_VOICE_ID
+    voice_provider = os.getenv("SITREPS_VOICE_PROVIDER", os.getenv("VOICE_PROVIDER", "elevenlabs"))
+
+    if SITREP_PIPELINE and STREAMS_AVAILABLE and voice_provider.lower().strip() != "none":
+        # Speak each sentence while the LLM is still writing the next (None: no stream slot free)
+        sitrep_script = await pipelined_sitrep(
+            chain, sitrep_inputs, room, FEMALE_VOICE_ID, voice_provider, received_at
+        )
+        if sitrep_script is not None:
+            logger.info(f"Generated SitRep (pipelined): {sitrep_script}")
+            return {
+                "status": "processed",
+                "room": room.room_id,
+                "sitrep": sitrep_script,
+                "audio_queued": True,
+                "pipelined": True,
+                **batch_info
+            }
+
+    message = await chain.ainvoke(sitrep_inputs)
+    sitrep_script = StrOutputParser().invoke(message)
+    record_llm_usage("sitrep", LLM_MODEL, getattr(message, "usage_metadata", None),
+                     fallback_text=" ".join(str(v) for v in sitrep_inputs.values()))
+
+    logger.info(f"Generated SitRep: {sitrep_script}")
+
+    # 4. Generate Voice (Enabled)
+    room.submit(generate_command_audio, sitrep_script, FEMALE_VOICE_ID, voice_provider, priority=PRIORITY_SITREP)
+
+    # Publish Initial Status (Before audio is ready)
+    status_data = {
+        "text": sitrep_script, # Display text immediately
+        "audio_available": False,
+        "timestamp": str(payloads[-1].get("timestamp", "now"))
+    }
+    room.publish(status_data)
+
+    return {
+        "status": "processed",
+        "room": room.room_id,
+        "sitrep": sitrep_script,
+        "audio_queued": True,
+        **batch_info
+    }
+
+async def pipelined_sitrep(chain, sitrep_inputs: dict, room, voice_id: str, provider: str, received_at: float) -> Optional[str]:
+    """
+    Streams the SitRep from the LLM and feeds each finished sentence to a pipelined audio stream.
+    The stream is an audio job on the room's queue at SitRep priority, so it supersedes older
+    queued clips and is superseded by newer ones like any other SitRep (see play_pipelined_sitrep).
+    Returns None (before calling the LLM) if no stream slot is free.
+    """
+    job = register_pipelined_job(voice_id, provider, started_at=received_at)
+    if job is None:
+        return None
+    # A job the queue sheds or supersedes never runs: discard it so its stream slot frees up
+    queued = room.submit(play_pipelined_sitrep, job, priority=PRIORITY_SITREP, on_drop=job.discard) is not None
+
+    def record_usage(message):
+        record_llm_usage("sitrep", LLM_MODEL, getattr(message, "usage_metadata", None),
+                         fallback_text=" ".join(str(v) for v in sitrep_inputs.values()))
+
+    try:
+        async for sentence in astream_sentences(chain, sitrep_inputs, on_complete=record_usage):
+            job.feed(sentence)
+    except BaseException:
+        # No SitRep to speak: end the job whether it is still queued or already playing
+        job.discard()
+        raise
+    finally:
+        job.close()
+
+    if not queued and job.sentences:
+        # Audio queue full: the text still reaches consoles
+        room.publish({"text": job.text, "audio_available": False, "timestamp": str(time.time())})
+    return job.text
+
+async def play_pipelined_sitrep(job, is_current: Optional[Callable[[], bool]] = None, room: str = DEFAULT_ROOM):
+    """
+    Audio job: synthesizes a pipelined SitRep's sentences as the LLM writes them.
+    Publishes one status once the first sentence is audible (or, if no audio came out, the text);
+    consoles follow the stream and fetch the final script from /audio/stream/{job_id}/text.
+    """
+    if job.discarded:
+        return
+    if is_current and not is_current():
+        logger.info("Pipelined SitRep superseded before synthesis started. Skipping.")
+        job.discard()
+        return
+    runner = asyncio.create_task(job.run())
+    await job.wait_started()
+
+    if is_current and not is_current():
+        logger.info("Pipelined SitRep superseded by a newer status. Not publishing.")
+    elif job.chunks:
+        rooms.get(room).publish({
+            "text": job.text,
+            "audio_available": True,
+            "audio_url": job.url,
+            "streaming": True,
+            "text_pending": True,
+            "timestamp": str(time.time())
+        })
+        logger.info(f"Audio streaming (pipelined): {job.job_id}")
+    else:
+        await job.wait_text(timeout=60.0)
+        if job.sentences:
+            rooms.get(room).publish({"text": job.text, "audio_available": False, "timestamp": str(time.time())})
+    # Hold this queue worker until synthesis ends, like any other audio job
+    await runner
+
 @app.post("/webhook/suspend")
 async def suspend_webhook(request: Request):
     """
@@ -171,83 +519,218 @@ async def suspend_webhook(request: Request):
 
 from voice_handler import DEFAULT_VOICE_ID
 
-def generate_command_audio(text: str, voice_id: str = DEFAULT_VOICE_ID, provider: str = None):
+# Serve fresh clips via /audio/stream/{job_id} as the provider produces them
+TTS_STREAMING = os.getenv("TTS_STREAMING", "false").lower().strip() in ("true", "1", "yes")
+if (TTS_STREAMING or SITREP_PIPELINE) and not STREAMS_AVAILABLE:
+    logger.warning("TTS_STREAMING/SITREP_PIPELINE need a single worker (WEB_CONCURRENCY=1). Serving stored clips instead.")
+    TTS_STREAMING = False
+
+@app.get("/audio/stream/{job_id}")
+async def stream_audio(job_id: str):
+    """
+    Chunked audio for a streaming TTS job.
+    Late listeners get the buffered prefix first, then follow the live stream.
+    """
+    job = get_stream_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown audio stream")
+
+    await job.wait_started()
+    if not job.chunks:
+        raise HTTPException(status_code=502, detail="Voice providers produced no audio")
+
+    async def counted_chunks():
+        sent = 0
+        try:
+            async for chunk in job.iter_chunks():
+                sent += len(chunk)
+                yield chunk
+        finally:
+            ext = next((e for e, t in CONTENT_TYPES.items() if t == job.media_type), "bin")
+            record_audio_bytes("wire", ext, sent)
+
+    return StreamingResponse(
+        counted_chunks(),
+        media_type=job.media_type,
+        headers={"Cache-Control": "no-store"}
+    )
+
+@app.get("/audio/stream/{job_id}/text")
+async def stream_text(job_id: str, wait: float = 30.0):
+    """
+    Script of a streaming job. A pipelined SitRep's text grows while the LLM writes it; this
+    waits (up to `wait` seconds) until it is final, so consoles update the card once.
+    """
+    job = get_stream_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown audio stream")
+    final = await job.wait_text(min(max(wait, 0.0), 60.0))
+    return {"text": job.text, "final": final}
+
+@app.get("/audio/{clip_id}")
+async def serve_audio(clip_id: str, request: Request):
+    """
+    Serves a stored clip with its real content type, ETag revalidation and byte ranges.
     """
-    Background task to generate audio and update status.json
+    clip = audio_store.get(clip_id)
+    if not clip:
+        raise HTTPException(status_code=404, detail="Unknown or expired clip")
+
+    etag = f'"{clip.etag}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=3600, immutable"
+    }
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if range_header:
+        byte_range = parse_range(range_header, clip.size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{clip.size}"})
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{clip.size}"
+        audio_store.record_sent(clip, end - start + 1)
+        return Response(audio_store.read(clip, start, end), status_code=206, media_type=clip.content_type, headers=headers)
+
+    audio_store.record_sent(clip, clip.size)
+    return Response(audio_store.read(clip), media_type=clip.content_type, headers=headers)
+
+async def generate_command_audio(
+    text: str,
+    voice_id: str = DEFAULT_VOICE_ID,
+    provider: str = None,
+    is_current: Optional[Callable[[], bool]] = None,
+    room: str = DEFAULT_ROOM
+):
     """
-    logger.info(f"Starting background audio generation for: {text[:30]}... (Voice: {voice_id}, Provider: {provider})")
+    Audio job: generate audio and update the room's status.
+    Runs on the room's audio queue workers using the pooled async TTS clients.
+    `is_current` reports whether a newer status has made this clip obsolete.
+    """
+    logger.info(f"Starting audio generation for: {text[:30]}... (Voice: {voice_id}, Provider: {provider})")
     try:
-        audio_bytes = generate_voice(text, voice_id, provider)
-        if audio_bytes:
-            audio_filename = f"response_{int(time.time())}.wav"
-            file_path = os.path.join("static", audio_filename)
-            with open(file_path, "wb") as f:
-                f.write(audio_bytes)
-            
-            # Update status.json so frontend picks it up
-            # We need to be careful not to overwrite a *newer* status, but for this single-stream demo it's acceptable.
-            # To be safer, we read, check timestamp, then write? 
-            # Or just write a specific "audio_update" status.
+        if TTS_STREAMING:
+            # Streaming mode: point the console at the live stream right away (unless already cached)
+            audio_bytes = peek_cached_voice(text, voice_id, provider)
+            if not audio_bytes:
+                if is_current and not is_current():
+                    logger.info("Audio superseded before streaming started. Skipping.")
+                    return
+                job = start_stream_job(text, voice_id, provider)
+                if job is not None:
+                    status_data = {
+                        "text": text,
+                        "audio_available": True,
+                        "audio_url": f"/audio/stream/{job.job_id}",
+                        "streaming": True,
+                        "timestamp": str(time.time())
+                    }
+                    rooms.get(room).publish(status_data)
+                    logger.info(f"Audio streaming: {job.job_id}")
+                    # Hold this queue worker until synthesis ends, so AUDIO_QUEUE_WORKERS caps streams too
+                    await job.wait_done()
+                    return
+                # Every stream slot is live: synthesize the whole clip instead
+                audio_bytes = await agenerate_voice_cached(text, voice_id, provider)
+        else:
+            audio_bytes = await agenerate_voice_cached(text, voice_id, provider)
+
+        if audio_bytes and is_current and not is_current():
+            logger.info("Audio superseded by a newer status. Not publishing.")
+        elif audio_bytes:
+            clip = audio_store.save(audio_bytes)
             
-            # Simplest approach for hackathon: Update global status with audio link.
+            # Publish so consoles (SSE subscribers and status.json pollers) pick it up.
+            # The is_current() check above keeps a stale clip from overwriting a newer status.
             status_data = {
                 "text": text, # Re-iterate text
                 "audio_available": True,
-                "audio_url": f"/static/{audio_filename}",
+                "audio_url": clip.url,
                 "timestamp": str(time.time()) # Update timestamp to trigger frontend fetch
             }
-            with open(os.path.join("static", "status.json"), "w") as f:
-                json.dump(status_data, f)
-            logger.info(f"Audio ready: {audio_filename}")
+            rooms.get(room).publish(status_data)
+            logger.info(f"Audio ready: {clip.clip_id} ({clip.content_type}, {clip.size} bytes)")
         else:
-             logger.warning("Background audio generation failed (no bytes returned).")
+             logger.warning("Audio generation failed (no bytes returned).")
     except Exception as e:
-        logger.error(f"Background audio task failed: {e}")
+        logger.error(f"Audio job failed: {e}")
 
 # --- Chaos Engineering ---
-CHAOS_MODE = False
+# Lives in shared state so every worker process agrees on it
+CHAOS_FLAG = "chaos_mode"
+
+async def chaos_enabled() -> bool:
+    # Off the event loop: SQLite can wait up to its busy timeout while another worker writes
+    return bool(await asyncio.to_thread(shared_state.get_flag, CHAOS_FLAG, False))
 
 @app.post("/chaos/start")
 async def start_chaos():
-    global CHAOS_MODE
-    CHAOS_MODE = True
+    await asyncio.to_thread(shared_state.set_flag, CHAOS_FLAG, True)
     logger.warning("CHAOS MODE ACTIVATED: Latency injection enabled.")
     return {"status": "chaos_started", "latency_injection": "enabled"}
 
 @app.post("/chaos/stop")
 async def stop_chaos():
-    global CHAOS_MODE
-    CHAOS_MODE = False
+    await asyncio.to_thread(shared_state.set_flag, CHAOS_FLAG, False)
     logger.info("CHAOS MODE DEACTIVATED: Latency injection disabled.")
     return {"status": "chaos_stopped"}
 
 @app.post("/command")
-async def process_voice_command(cmd: VoiceCommand, background_tasks: BackgroundTasks):
+async def process_voice_command(cmd: VoiceCommand):
     """
     Process a voice transcript, validate intent, and execute tool.
     Returns text immediately; queues audio generation.
     """
-    global CHAOS_MODE
     start_time = time.time()
     
     # 0. Chaos Injection
     start_time = time.time()
     
-    if CHAOS_MODE:
+    if await chaos_enabled():
         # Simulate high latency (2.5s - 4.0s) to trip Datadog monitors
         delay = random.uniform(2.5, 4.0)
         logger.warning(f"Chaos Mode: Injecting {delay:.2f}s latency...")
         await asyncio.sleep(delay)
 
+    room = get_room(cmd.room)
     logger.info(f"Processing Command: {cmd.transcript}")
     
-    if not llm:
+    # Fast path: deterministic parser for the common grammar; the LLM only sees what it can't handle
+    fast_intent = fast_path_intent(cmd.transcript)
+    intent_source = None
+    llm_usage = None
+
+    llm = None if fast_intent else get_llm()
+    if not fast_intent and not llm:
         raise HTTPException(status_code=503, detail="LLM Offline")
 
     # Intent Classification
     try:
-        chain = intent_prompt | llm | StrOutputParser()
-        intent_str = await chain.ainvoke({"transcript": cmd.transcript})
+        if fast_intent:
+            intent_source = "fast_path"
+            intent_str = json.dumps(fast_intent)
+        else:
+            # Identical transcripts within the TTL (or already in flight) share one LLM call
+            # Keep the raw message (not `| StrOutputParser()`) so its usage metadata is available
+            from langchain_core.output_parsers import StrOutputParser
+            from prompts import intent_prompt
+
+            chain = intent_prompt | llm
+
+            async def classify_with_llm():
+                nonlocal llm_usage
+                llm_start = time.time()
+                message = await chain.ainvoke({"transcript": cmd.transcript})
+                record_llm_latency(time.time() - llm_start)
+                llm_usage = getattr(message, "usage_metadata", None)
+                return StrOutputParser().invoke(message)
+
+            intent_str, cache_result = await intent_cache.get_or_compute(cmd.transcript, classify_with_llm)
+            intent_source = "llm" if cache_result == "miss" else f"intent_cache_{cache_result}"
         
         # Robustly extract JSON from potential conversational output
         try:
@@ -265,21 +748,22 @@ async def process_voice_command(cmd: VoiceCommand, background_tasks: BackgroundT
             logger.info(json.dumps({
                 "event": "intent_analysis",
                 "transcript": cmd.transcript,
-                "intent": intent_dict
+                "intent": intent_dict,
+                "intent_source": intent_source
             }))
             
             # Metric Instrumentation: Track Refusals
             tool_name = intent_dict.get("tool_name")
             
             if tool_name == "refusal":
-                statsd.increment('echo_ops.intent.refusal', tags=[
+                metrics.increment('echo_ops.intent.refusal', tags=[
                     f"user_id:{cmd.user_id}",
                     "service:sentinel-ai",
                     "reason:blocked_by_ai" # Generic tag to avoid high cardinality if reason is free text
                 ])
             elif tool_name:
                  # Track successful tool identification
-                statsd.increment('echo_ops.intent.tool_usage', tags=[
+                metrics.increment('echo_ops.intent.tool_usage', tags=[
                     f"user_id:{cmd.user_id}",
                     "service:sentinel-ai",
                     f"tool_name:{tool_name}"
@@ -293,23 +777,17 @@ async def process_voice_command(cmd: VoiceCommand, background_tasks: BackgroundT
 
         # Metric Instrumentation: Latency SLO
         duration = time.time() - start_time
-        statsd.gauge('echo_ops.latency', duration, tags=["service:sentinel-ai"])
+        metrics.gauge('echo_ops.latency', duration, tags=["service:sentinel-ai"])
         
         # "Satisfactory" metric for SLO (1 if <1s, 0 if >1s)
         is_satisfactory = 1 if duration < 1.0 else 0
-        statsd.increment('echo_ops.latency.satisfactory', value=is_satisfactory, tags=["service:sentinel-ai"])
+        metrics.increment('echo_ops.latency.satisfactory', value=is_satisfactory, tags=["service:sentinel-ai"])
         # Total count for accurate SLO denominator (Total = Satisfactory + Unsatisfactory)
 
-        statsd.increment('echo_ops.latency.total', tags=["service:sentinel-ai"])
+        metrics.increment('echo_ops.latency.total', tags=["service:sentinel-ai"])
 
-        # Sentiment Analysis
-        try:
-            blob = TextBlob(cmd.transcript)
-            sentiment_polarity = blob.sentiment.polarity
-            statsd.gauge('ai.agent.sentiment', sentiment_polarity, tags=["service:sentinel-ai"])
-            logger.info(f"Sentiment Analysis: {sentiment_polarity} for '{cmd.transcript}'")
-        except Exception as e:
-            logger.error(f"Sentiment Analysis Failed: {e}")
+        # Sentiment Analysis (scored off the event loop in micro-batches; not awaited)
+        sentiment_scorer.score_in_background(cmd.transcript)
 
         # Construct Feedback Message (and Audio Script)
         message = ""
@@ -345,9 +823,9 @@ async def process_voice_command(cmd: VoiceCommand, background_tasks: BackgroundT
             elif tool_name == "get_status":
                 service = args.get("service_name", "system")
                 audio_script = f"Checking status for {service}. All systems appear operational."
-            elif tool_name == "rollback_deployment":
+            elif tool_name in ("rollback_service", "rollback_deployment"):
                 service = args.get("service_name", "the service")
-                version = args.get("target_version", "previous version")
+                version = args.get("version", args.get("target_version", "previous version"))
                 audio_script = f"Initiating rollback for {service} to version {version}."
             else:
                  # Fallback
@@ -364,18 +842,18 @@ async def process_voice_command(cmd: VoiceCommand, background_tasks: BackgroundT
                 "audio_available": False, 
                 "timestamp": str(time.time())
             }
-            with open(os.path.join("static", "status.json"), "w") as f:
-                json.dump(status_data, f)
+            room.publish(status_data)
         except Exception as e:
             logger.error(f"Failed to update dashboard status: {e}")
 
-        # Queue Audio Generation
+        # Queue Audio Generation (behind any pending SitRep audio)
         voice_provider = os.getenv("COMMANDS_VOICE_PROVIDER", os.getenv("VOICE_PROVIDER", "elevenlabs"))
-        background_tasks.add_task(generate_command_audio, audio_script, DEFAULT_VOICE_ID, voice_provider)
+        room.submit(generate_command_audio, audio_script, DEFAULT_VOICE_ID, voice_provider, priority=PRIORITY_COMMAND)
 
         # Return Immediate Response
         return {
             "status": "executed", 
+            "room": room.room_id,
             "intent": intent_dict,
             "message": message
         }
@@ -385,28 +863,16 @@ async def process_voice_command(cmd: VoiceCommand, background_tasks: BackgroundT
         return {"status": "failed", "error": str(e)}
 
     finally:
-        # 4. Telemetry: Token Usage & Cost
+        # 4. Telemetry: Token Usage & Cost (only when this request actually called the LLM)
         try:
-            # Estimation Fallback (SAFE)
-            input_tokens = len(cmd.transcript) // 4
-            output_tokens = 50 
-            
-            # Report to Datadog
-            statsd.increment('echo_ops.llm.tokens.prompt', value=input_tokens, tags=["model:gemini-2.5-flash-lite"])
-            statsd.increment('echo_ops.llm.tokens.completion', value=output_tokens, tags=["model:gemini-2.5-flash-lite"])
-            statsd.increment('echo_ops.llm.tokens.total', value=input_tokens + output_tokens, tags=["model:gemini-2.5-flash-lite"])
-            
-            # Cost Estimation
-            cost = (input_tokens / 1000 * 0.0001) + (output_tokens / 1000 * 0.0002)
-            statsd.gauge('echo_ops.llm.cost', cost, tags=["model:gemini-2.5-flash-lite"])
-            
-            logger.info(f"Telemetry Sent: {input_tokens} in, {output_tokens} out, ${cost:.6f}")
+            if intent_source == "llm":
+                record_llm_usage("intent", LLM_MODEL, llm_usage, fallback_text=cmd.transcript)
 
         except Exception as tel_e:
             logger.warning(f"Telemetry Error: {tel_e}")
 
 @app.get("/debug/audio")
-def debug_audio():
+async def debug_audio():
     """
     Debug endpoint to verify voice generation configuration and execution.
     """
@@ -418,6 +884,7 @@ def debug_audio():
         
         config_status = {
             "VOICE_PROVIDER": provider,
+            "PROVIDER_MODE": PROVIDER_MODE,
             "GOOGLE_API_KEY_PRESENT": bool(google_key),
             "ELEVENLABS_API_KEY_PRESENT": bool(eleven_key),
             "GOOGLE_API_KEY_LENGTH": len(google_key) if google_key else 0
@@ -426,7 +893,7 @@ def debug_audio():
         # Attempt Generation
         logger.info(f"Debug Audio: Attempting generation with provider={provider}")
         start_time = time.time()
-        audio_content = generate_voice("This is a test of the EchoOps audio system.")
+        audio_content = await agenerate_voice_cached("This is a test of the EchoOps audio system.")
         duration = time.time() - start_time
         
         result = {
@@ -438,6 +905,13 @@ def debug_audio():
             }
         }
         
+        cache = get_audio_cache()
+        result["cache"] = cache.snapshot() if cache else {"enabled": False}
+        result["store"] = audio_store.snapshot()
+        result["encoder"] = audio_encoder.snapshot()
+        result["providers"] = provider_registry.snapshot()
+        result["rooms"] = rooms.snapshot()
+
         if not audio_content:
              result["error"] = "Generation failed. Check logs for details."
              
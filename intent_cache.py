@@ -0,0 +1,103 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple, Callable, Awaitable
+
+from metrics import metrics
+
+from intent_parser import normalize_transcript
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 30.0
+DEFAULT_MAX_ENTRIES = 512
+
+# Punctuation is dropped, except a dot inside a number ("version 2.3" != "version 23")
+_PUNCT = re.compile(r"(?<!\d)\.|\.(?!\d)|[^\w\s.]")
+
+
+def normalize_key(transcript: str) -> str:
+    """Casefolded transcript with the "Echo," wake word and punctuation stripped."""
+    text = _PUNCT.sub(" ", normalize_transcript(transcript))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class IntentCache:
+    """
+    TTL + LRU cache of raw intent classifier output, keyed on the normalized transcript.
+    Concurrent misses for the same key share one in-flight computation (single-flight).
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: str):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, transcript: str, compute: Callable[[], Awaitable[str]]) -> Tuple[str, str]:
+        """
+        Returns (value, result) where result is "hit", "coalesced" or "miss".
+        Errors are not cached; every waiter on a failed flight sees the exception.
+        The computation runs in its own task, so a cancelled caller doesn't cancel it for the others.
+        """
+        key = normalize_key(transcript)
+        if not key or self.ttl_seconds <= 0:
+            return await compute(), "miss"
+
+        value = self.get(key)
+        if value is not None:
+            self._count("hit")
+            return value, "hit"
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._count("coalesced")
+            return await asyncio.shield(inflight), "coalesced"
+
+        task = asyncio.ensure_future(compute())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._land(key, t))
+        self._count("miss")
+        return await asyncio.shield(task), "miss"
+
+    def _land(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        # Retrieved here so an unawaited failure doesn't log "exception never retrieved"
+        if task.exception() is None:
+            self.put(key, task.result())
+
+    @staticmethod
+    def _count(result: str):
+        try:
+            metrics.increment('echo_ops.intent.cache', tags=["service:sentinel-ai", f"result:{result}"])
+        except Exception:
+            pass
+
+
+intent_cache = IntentCache(
+    ttl_seconds=float(os.getenv("INTENT_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+    max_entries=int(os.getenv("INTENT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+)
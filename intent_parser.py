@@ -0,0 +1,157 @@
+import os
+import re
+import logging
+from typing import Optional, Dict, Any, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Below this confidence the transcript goes to the LLM
+MIN_CONFIDENCE = float(os.getenv("FAST_INTENT_MIN_CONFIDENCE", "0.9"))
+
+# Only these services are handled without the LLM (spoken form, comma-separated)
+DEFAULT_SERVICES = (
+    "payment service,payment gateway,checkout service,user service,user database,"
+    "frontend,frontend deployment,auth service,api gateway"
+)
+FAST_INTENT_SERVICES = [
+    s.strip().lower() for s in os.getenv("FAST_INTENT_SERVICES", DEFAULT_SERVICES).split(",") if s.strip()
+]
+# Scaling outside 1..MAX_REPLICAS is left to the LLM
+MAX_REPLICAS = int(os.getenv("FAST_INTENT_MAX_REPLICAS", "20"))
+
+# Anything that smells destructive or manipulative is left to the LLM (which owns refusals)
+_UNSAFE = re.compile(
+    r"\b(delete|drop|truncate|wipe|destroy|purge|erase|remove|kill|shutdown|shut down|disable|"
+    r"ignore|bypass|override|sudo|rm)\b"
+)
+# So is anything aimed at more than one named service
+_BROAD = re.compile(r"\b(all|every|everything|each|entire|whole|cluster|fleet)\b")
+_WAKE_WORD = re.compile(r"^\s*(hey\s+)?echo\b[\s,.:!-]*")
+_POLITE = re.compile(r"^(please|can you|could you|would you|go ahead and|i need you to|i want you to)\s+")
+_TRAILING = re.compile(r"[\s.!?]+$")
+
+_NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20,
+}
+
+_ENVIRONMENTS = {"prod": "production", "production": "production", "staging": "staging", "stage": "staging",
+                 "dev": "development", "development": "development", "qa": "qa"}
+
+# Exactly one allow-listed service, e.g. "the payment service"
+_SERVICE = r"(?:the\s+)?(?P<service>{})".format(
+    "|".join(re.escape(name) for name in sorted(FAST_INTENT_SERVICES, key=len, reverse=True))
+    or r"(?!)"
+)
+_ENV = r"(?:\s+(?:in|on)\s+(?:the\s+)?(?P<env>prod|production|staging|stage|dev|development|qa)(?:\s+environment)?)?"
+
+# (tool_name, pattern, confidence). Patterns are matched against the whole normalized transcript.
+_RULES = [
+    ("restart_service", re.compile(rf"^(?:restart|reboot|bounce|recycle)\s+{_SERVICE}{_ENV}$"), 0.95),
+    ("scale_service", re.compile(
+        rf"^(?:scale(?:\s+up|\s+out|\s+down)?|resize)\s+{_SERVICE}\s+to\s+(?P<replicas>\d+|[a-z]+)(?:\s+(?:replicas?|instances?|pods?|nodes?))?$"
+    ), 0.95),
+    ("rollback_service", re.compile(
+        rf"^(?:roll\s*back|revert)\s+{_SERVICE}\s+to\s+(?:the\s+)?(?:(?:version|release)\s+|v)?(?P<version>\d+(?:\.\d+)*|previous(?:\s+version)?|last\s+(?:good\s+)?version)$"
+    ), 0.95),
+    ("get_logs", re.compile(
+        rf"^(?:(?:get|show|fetch|pull)(?:\s+me)?\s+(?:the\s+)?logs\s+(?:for|of|from)\s+{_SERVICE})$"
+    ), 0.92),
+    ("get_status", re.compile(
+        rf"^(?:(?:get|show|check)(?:\s+me)?\s+(?:the\s+)?(?:status|health)\s+(?:of|for|on)\s+{_SERVICE})$"
+    ), 0.92),
+    ("get_status", re.compile(rf"^(?:what(?:'s|\s+is)\s+the\s+(?:status|health)\s+of\s+{_SERVICE})$"), 0.92),
+    ("get_status", re.compile(rf"^(?:status\s+(?:of|for|on)\s+{_SERVICE})$"), 0.9),
+]
+
+
+def normalize_transcript(transcript: str) -> str:
+    """Casefold, strip the "Echo," wake word, politeness prefixes and trailing punctuation."""
+    text = transcript.casefold().strip()
+    text = _WAKE_WORD.sub("", text)
+    text = _POLITE.sub("", text)
+    text = _TRAILING.sub("", text)
+    return re.sub(r"\s+", " ", text)
+
+
+def _clean_service(name: str) -> str:
+    return name.strip(" -_")
+
+
+def _to_int(value: str) -> Optional[int]:
+    if value.isdigit():
+        return int(value)
+    return _NUMBER_WORDS.get(value)
+
+
+def _build(tool_name: str, m: re.Match) -> Optional[Dict[str, Any]]:
+    groups = m.groupdict()
+    service = _clean_service(groups.get("service") or "")
+    if not service:
+        return None
+    args: Dict[str, Any] = {"service_name": service}
+
+    if tool_name == "restart_service":
+        if groups.get("env"):
+            args["environment"] = _ENVIRONMENTS[groups["env"]]
+    elif tool_name == "scale_service":
+        replicas = _to_int(groups["replicas"])
+        if replicas is None or not 1 <= replicas <= MAX_REPLICAS:
+            return None
+        args["replicas"] = replicas
+    elif tool_name == "rollback_service":
+        version = groups["version"]
+        args["version"] = version if version[0].isdigit() else "previous"
+
+    return {"tool_name": tool_name, "arguments": args}
+
+
+def classify(transcript: str) -> Tuple[Optional[Dict[str, Any]], float]:
+    """
+    Rule-based intent classification for the tools in INTENT_SYSTEM_PROMPT.
+    Returns (intent, confidence); intent is None when no rule applies.
+    Only whole transcripts naming one allow-listed service match: extra words, broad
+    targets ("all services") and unsafe verbs are left to the LLM.
+    """
+    text = normalize_transcript(transcript)
+    if not text or _UNSAFE.search(text) or _BROAD.search(text):
+        return None, 0.0
+
+    for tool_name, pattern, confidence in _RULES:
+        m = pattern.match(text)
+        if m:
+            intent = _build(tool_name, m)
+            if intent:
+                return intent, confidence
+    return None, 0.0
+
+
+# Rolling estimate of what an LLM intent call costs, used to report time saved by the fast path
+_llm_latency_ewma: Optional[float] = None
+_EWMA_ALPHA = 0.2
+
+
+def record_llm_latency(seconds: float):
+    global _llm_latency_ewma
+    if _llm_latency_ewma is None:
+        _llm_latency_ewma = seconds
+    else:
+        _llm_latency_ewma = _EWMA_ALPHA * seconds + (1 - _EWMA_ALPHA) * _llm_latency_ewma
+
+
+def fast_path_intent(transcript: str) -> Optional[Dict[str, Any]]:
+    """
+    Intent from the deterministic parser if confident enough, else None (caller uses the LLM).
+    Reports hit/miss and the LLM latency avoided on a hit.
+    """
+    intent, confidence = classify(transcript)
+    hit = intent is not None and confidence >= MIN_CONFIDENCE
+    try:
+        metrics.increment('echo_ops.intent.fast_path', tags=["service:sentinel-ai", f"result:{'hit' if hit else 'miss'}"])
+        if hit and _llm_latency_ewma is not None:
+            metrics.gauge('echo_ops.intent.fast_path.saved_seconds', _llm_latency_ewma, tags=["service:sentinel-ai"])
+    except Exception:
+        pass
+    return intent if hit else None
@@ -0,0 +1,431 @@
+import os
+import re
+import json
+import time
+import bisect
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Dict, List, Tuple, Any, Iterable
+
+import requests
+
+from metrics import metrics
+from log_reducer import reduce_records
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_SECONDS = 900      # How much recent history the index keeps
+DEFAULT_LOOKBACK_SECONDS = 300    # Log lines considered relevant before an alert fires
+DEFAULT_REFRESH_SECONDS = 15      # Backend poll interval
+DEFAULT_INGESTION_LAG_SECONDS = 120  # How late a search backend may index a line after its timestamp
+DEFAULT_CACHE_ENTRIES = 128
+DEFAULT_QUERY = "status:(error OR warn)"
+
+RELEVANT_STATUSES = ("emergency", "alert", "critical", "error", "warn")
+
+_SERVICE = re.compile(r"\bservice:([\w.\-/]+)")
+_LEVEL = re.compile(r"\b(EMERGENCY|ALERT|CRITICAL|ERROR|WARN(?:ING)?|INFO|DEBUG)\b")
+_COMPONENT = re.compile(r"\b(?:service|Component)=([\w.\-/]+)")
+_TIMESTAMP = re.compile(r"\bTIMESTAMP=(\S+)")
+_MESSAGE = re.compile(r"\bMessage='(.*)'\s*$")
+
+
+def _normalize_status(status: Optional[str]) -> str:
+    status = (status or "info").lower()
+    return "warn" if status == "warning" else status
+
+
+def _parse_timestamp(value: Any, default: float) -> float:
+    """Epoch seconds from epoch s/ms or an ISO-8601 string."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.replace(".", "", 1).isdigit()):
+        ts = float(value)
+        return ts / 1000.0 if ts > 1e11 else ts
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    except ValueError:
+        return default
+
+
+class LogRecord:
+    def __init__(self, timestamp: float, service: str, status: str, message: str, record_id: Optional[str] = None):
+        self.timestamp = timestamp
+        self.service = service
+        self.status = status
+        self.message = message
+        self.record_id = record_id  # Backend event id, when the backend may return a line twice
+
+    def format(self) -> str:
+        ts = datetime.fromtimestamp(self.timestamp, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        return f"TIMESTAMP={ts} {self.status.upper()} Component={self.service} Message='{self.message}'"
+
+
+# --- Backends ---
+
+class LogBackend:
+    """
+    Source of log records. `fetch` is blocking and is called off the event loop.
+    Backends that index lines late set `ingestion_lag`: each fetch then overlaps the previous
+    one by that much, and must return record ids so the overlap can be de-duplicated.
+    """
+
+    name = "base"
+    ingestion_lag = 0.0
+
+    def fetch(self, since: float, until: float) -> List[LogRecord]:
+        raise NotImplementedError
+
+
+class FileTailBackend(LogBackend):
+    """
+    Tails a local log file: JSONL (timestamp/service/status/message, Datadog-style keys accepted)
+    or plain `TIMESTAMP=... LEVEL Component=... ...` lines. Only bytes appended since the last
+    fetch are read; a truncated or rotated file is re-read from the start.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str, default_service: str = "unknown"):
+        self.path = path
+        self.default_service = default_service
+        self._offset = 0
+
+    def fetch(self, since: float, until: float) -> List[LogRecord]:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size < self._offset:
+            self._offset = 0
+
+        records = []
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # Partial line still being written; pick it up next time
+                self._offset += len(raw)
+                # The byte offset already makes this incremental, so late-written lines stamped
+                # before `since` are kept; the index prunes anything outside its window
+                record = self._parse(raw.decode("utf-8", errors="replace").strip(), until)
+                if record:
+                    records.append(record)
+        return records
+
+    def _parse(self, line: str, now: float) -> Optional[LogRecord]:
+        if not line:
+            return None
+        if line.startswith("{"):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                entry = None
+            if isinstance(entry, dict):
+                attrs = entry.get("attributes", entry)
+                return LogRecord(
+                    _parse_timestamp(attrs.get("timestamp", attrs.get("date")), now),
+                    str(attrs.get("service") or self.default_service),
+                    _normalize_status(attrs.get("status") or attrs.get("level")),
+                    str(attrs.get("message", "")),
+                )
+
+        ts = _TIMESTAMP.search(line)
+        level = _LEVEL.search(line)
+        component = _COMPONENT.search(line)
+        message = _MESSAGE.search(line)
+        return LogRecord(
+            _parse_timestamp(ts.group(1) if ts else None, now),
+            component.group(1) if component else self.default_service,
+            _normalize_status(level.group(1) if level else None),
+            message.group(1) if message else line,
+        )
+
+
+class DatadogLogsBackend(LogBackend):
+    """Datadog Logs Search API (v2), paginated by cursor."""
+
+    name = "datadog"
+    PAGE_LIMIT = 1000
+    MAX_PAGES = 5
+
+    def __init__(self, query: str = DEFAULT_QUERY, site: Optional[str] = None, timeout: float = 10.0,
+                 ingestion_lag: float = DEFAULT_INGESTION_LAG_SECONDS):
+        self.query = query
+        self.ingestion_lag = ingestion_lag
+        self.url = f"https://api.{site or os.getenv('DD_SITE', 'datadoghq.com')}/api/v2/logs/events/search"
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def fetch(self, since: float, until: float) -> List[LogRecord]:
+        headers = {
+            "DD-API-KEY": os.getenv("DD_API_KEY", ""),
+            "DD-APPLICATION-KEY": os.getenv("DD_APP_KEY", ""),
+            "Content-Type": "application/json",
+        }
+        body: Dict[str, Any] = {
+            "filter": {
+                "query": self.query,
+                "from": datetime.fromtimestamp(since, tz=timezone.utc).isoformat(),
+                "to": datetime.fromtimestamp(until, tz=timezone.utc).isoformat(),
+            },
+            "sort": "timestamp",
+            "page": {"limit": self.PAGE_LIMIT},
+        }
+
+        records = []
+        for _ in range(self.MAX_PAGES):
+            response = self._session.post(self.url, json=body, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            payload = response.json()
+            for event in payload.get("data", []):
+                attrs = event.get("attributes", {})
+                records.append(LogRecord(
+                    _parse_timestamp(attrs.get("timestamp"), until),
+                    str(attrs.get("service") or "unknown"),
+                    _normalize_status(attrs.get("status")),
+                    str(attrs.get("message", "")),
+                    event.get("id"),
+                ))
+            cursor = payload.get("meta", {}).get("page", {}).get("after")
+            if not cursor:
+                break
+            body["page"]["cursor"] = cursor
+        return records
+
+
+# --- Index ---
+
+class LogIndex:
+    """
+    Recent log records bucketed by (service, status), each bucket sorted by timestamp,
+    so an alert's context is a couple of bisects instead of a scan or a remote search.
+    """
+
+    def __init__(self, window_seconds: float = DEFAULT_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._buckets: Dict[Tuple[str, str], Tuple[List[float], List[LogRecord]]] = {}
+        self._ids: Dict[str, float] = {}  # record id -> timestamp, for records that carry one
+        self._size = 0
+
+    def add(self, records: Iterable[LogRecord]) -> int:
+        """Adds records and returns how many were new; ids already indexed (overlapping fetches) are skipped."""
+        added = 0
+        for record in records:
+            if record.record_id is not None:
+                if record.record_id in self._ids:
+                    continue
+                self._ids[record.record_id] = record.timestamp
+            times, items = self._buckets.setdefault((record.service.lower(), record.status), ([], []))
+            idx = bisect.bisect_right(times, record.timestamp)
+            times.insert(idx, record.timestamp)
+            items.insert(idx, record)
+            self._size += 1
+            added += 1
+        return added
+
+    def prune(self, now: float):
+        cutoff = now - self.window_seconds
+        for key in list(self._buckets):
+            times, items = self._buckets[key]
+            idx = bisect.bisect_left(times, cutoff)
+            if idx:
+                del times[:idx]
+                del items[:idx]
+                self._size -= idx
+            if not times:
+                del self._buckets[key]
+        for record_id in [i for i, ts in self._ids.items() if ts < cutoff]:
+            del self._ids[record_id]
+
+    def query(self, service: Optional[str], statuses: Iterable[str], since: float, until: float) -> List[LogRecord]:
+        """Records in [since, until] for `service` (all services when None), oldest first."""
+        statuses = set(statuses)
+        service = service.lower() if service else None
+        found = []
+        for (svc, status), (times, items) in self._buckets.items():
+            if status not in statuses or (service and svc != service):
+                continue
+            lo = bisect.bisect_left(times, since)
+            hi = bisect.bisect_right(times, until)
+            found.extend(items[lo:hi])
+        found.sort(key=lambda r: r.timestamp)
+        return found
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+
+# --- Provider ---
+
+def alert_service(payload: Dict[str, Any]) -> Optional[str]:
+    """Service named by the alert's tags, explicit field or query scope."""
+    if payload.get("service"):
+        return str(payload["service"])
+    tags = payload.get("tags")
+    if isinstance(tags, (list, tuple)):
+        tags = ",".join(str(t) for t in tags)
+    for source in (tags, payload.get("alert_query"), payload.get("query")):
+        m = _SERVICE.search(str(source or ""))
+        if m:
+            return m.group(1)
+    return None
+
+
+def simulated_logs(alert_title: str) -> str:
+    """Canned demo context, used when no log backend is configured."""
+    logs = "TIMESTAMP=2024-12-22T10:00:01 ERROR Component=PaymentGateway Message='Connection Refused: 502 Bad Gateway'\nTIMESTAMP=2024-12-22T10:00:02 WARN Component=CheckoutService Message='Retrying transaction...'"
+    if "latency" in str(alert_title).lower():
+        logs += "\nTIMESTAMP=2024-12-22T10:00:05 ERROR Component=DB_Pool Message='Timeout waiting for connection'"
+    return logs
+
+
+class LogContextProvider:
+    """
+    Keeps a LogIndex fed from a backend (polled in the background, at most once per refresh
+    interval) and answers "which log lines explain this alert" from it.
+    Answers are cached per (service, alert window) so re-deliveries and sibling alerts reuse them.
+    """
+
+    def __init__(self, backend: Optional[LogBackend], window_seconds: float = DEFAULT_WINDOW_SECONDS,
+                 lookback_seconds: float = DEFAULT_LOOKBACK_SECONDS, refresh_seconds: float = DEFAULT_REFRESH_SECONDS,
+                 cache_entries: int = DEFAULT_CACHE_ENTRIES):
+        if refresh_seconds <= 0:
+            raise ValueError(f"Log context refresh interval must be positive (got {refresh_seconds})")
+        self.backend = backend
+        self.index = LogIndex(window_seconds)
+        self.lookback_seconds = lookback_seconds
+        self.refresh_seconds = refresh_seconds
+        self.cache_entries = cache_entries
+        self._cache: "OrderedDict[Tuple[Optional[str], int], str]" = OrderedDict()
+        self._watermark: Optional[float] = None
+        self._refreshed_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self.backend is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Log context refresh failed ({self.backend.name}): {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def refresh(self):
+        """Pulls records newer than the last fetch into the index (single-flight)."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = time.time()
+            if now - self._refreshed_at < self.refresh_seconds and self._watermark is not None:
+                return
+            if self._watermark is None:
+                since = now - self.index.window_seconds
+            else:
+                # Re-read the tail of the last window: lines indexed late are stamped before the watermark
+                since = self._watermark - self.backend.ingestion_lag
+            start = time.monotonic()
+            records = await asyncio.to_thread(self.backend.fetch, since, now)
+            added = self.index.add(records)
+            self.index.prune(now)
+            self._watermark = now
+            self._refreshed_at = now
+            if added:
+                # New lines may belong to windows already answered
+                self._cache.clear()
+            try:
+                tags = ["service:sentinel-ai", f"backend:{self.backend.name}"]
+                metrics.gauge('echo_ops.logs.refresh.duration', time.monotonic() - start, tags=tags)
+                metrics.gauge('echo_ops.logs.index.size', self.index.size, tags=tags)
+            except Exception:
+                pass
+
+    # --- Lookup ---
+
+    async def context_for(self, payload: Dict[str, Any]) -> str:
+        """Log snippet block for an alert payload."""
+        alert_title = payload.get("event_title", payload.get("title", "Unknown Alert"))
+        if self.backend is None:
+            return simulated_logs(alert_title)
+
+        if self._watermark is None or time.time() - self._refreshed_at > 2 * self.refresh_seconds:
+            # Not started yet, or the poller has fallen behind
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Log context refresh failed ({self.backend.name}): {e}")
+
+        service = alert_service(payload)
+        alert_ts = _parse_timestamp(payload.get("date", payload.get("last_updated", payload.get("timestamp"))), time.time())
+        # Alerts firing within the same refresh interval share one answer
+        key = (service, int(alert_ts // self.refresh_seconds))
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self._count("hit")
+            return cached
+        self._count("miss")
+
+        records = self.index.query(service, RELEVANT_STATUSES, alert_ts - self.lookback_seconds, alert_ts)
+        if not records and service:
+            # Tag names don't always match log service names; fall back to everything relevant
+            records = self.index.query(None, RELEVANT_STATUSES, alert_ts - self.lookback_seconds, alert_ts)
+        # Thousands of near-identical lines collapse into a few ranked templates within the token budget
+        # (CPU-bound on large windows, so off the event loop)
+        if records:
+            context = await asyncio.to_thread(reduce_records, records)
+        else:
+            context = "No relevant log lines in the alert window."
+
+        self._cache[key] = context
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+        return context
+
+    @staticmethod
+    def _count(result: str):
+        try:
+            metrics.increment('echo_ops.logs.context.lookup', tags=["service:sentinel-ai", f"result:{result}"])
+        except Exception:
+            pass
+
+
+def _build_backend() -> Optional[LogBackend]:
+    kind = os.getenv("LOG_CONTEXT_BACKEND", "simulated").lower().strip()
+    if kind == "file":
+        return FileTailBackend(os.getenv("LOG_CONTEXT_FILE", "logs/app.jsonl"))
+    if kind == "datadog":
+        return DatadogLogsBackend(
+            os.getenv("LOG_CONTEXT_QUERY", DEFAULT_QUERY),
+            ingestion_lag=float(os.getenv("LOG_CONTEXT_INGESTION_LAG_SECONDS", DEFAULT_INGESTION_LAG_SECONDS)),
+        )
+    if kind != "simulated":
+        logger.warning(f"Unknown LOG_CONTEXT_BACKEND '{kind}'. Using simulated logs.")
+    return None
+
+
+log_context = LogContextProvider(
+    _build_backend(),
+    window_seconds=float(os.getenv("LOG_CONTEXT_WINDOW_SECONDS", DEFAULT_WINDOW_SECONDS)),
+    lookback_seconds=float(os.getenv("LOG_CONTEXT_LOOKBACK_SECONDS", DEFAULT_LOOKBACK_SECONDS)),
+    refresh_seconds=float(os.getenv("LOG_CONTEXT_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS)),
+)
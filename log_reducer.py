@@ -0,0 +1,196 @@
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, List, Iterable
+
+from metrics import metrics, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 400
+DEFAULT_SIMILARITY = 0.5
+MAX_EXAMPLES = 2
+MAX_KNOWN_TEMPLATES = 2048
+
+WILDCARD = "<*>"
+
+SEVERITY = {"emergency": 5, "alert": 4, "critical": 4, "error": 3, "warn": 2, "info": 1, "debug": 0}
+
+# Variable fields masked before clustering (Drain's preprocessing step), most specific first
+_MASKS = [
+    re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"),  # UUID
+    re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"),                                           # IPv4[:port]
+    re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{12,}\b"),                                        # hex ids
+    re.compile(r"(?<![A-Za-z])[-+]?\d+(?:\.\d+)?(?:ms|s|%|kb|mb|gb)?(?![A-Za-z])", re.IGNORECASE),  # numbers
+]
+
+
+def tokenize(message: str) -> List[str]:
+    for mask in _MASKS:
+        message = mask.sub(WILDCARD, message)
+    return message.split()
+
+
+class LogCluster:
+    def __init__(self, template: List[str], service: str, status: str, line: str, timestamp: float):
+        self.template = template
+        self.services = {service}
+        self.status = status
+        self.count = 1
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.examples = [line]
+
+    @property
+    def severity(self) -> int:
+        return SEVERITY.get(self.status, 1)
+
+    def template_text(self) -> str:
+        return " ".join(self.template)
+
+    def absorb(self, tokens: List[str], service: str, status: str, line: str, timestamp: float):
+        self.template = [t if t == o else WILDCARD for t, o in zip(self.template, tokens)]
+        self.services.add(service)
+        if SEVERITY.get(status, 1) > self.severity:
+            self.status = status
+        self.count += 1
+        self.first_seen = min(self.first_seen, timestamp)
+        self.last_seen = max(self.last_seen, timestamp)
+        if len(self.examples) < MAX_EXAMPLES and line not in self.examples:
+            self.examples.append(line)
+
+
+class LogReducer:
+    """
+    Streaming Drain-style template miner.
+
+    Lines are masked, then routed by (token count, first token) to a small group of clusters and
+    merged into the most similar template when enough positions match; otherwise they start a
+    new cluster. `render` emits the clusters ranked by severity, then novelty, then volume,
+    until the token budget is spent.
+    """
+
+    def __init__(self, similarity: float = DEFAULT_SIMILARITY, history: Optional["TemplateHistory"] = None):
+        self.similarity = similarity
+        self.history = history
+        self._groups: Dict[tuple, List[LogCluster]] = {}
+        self.lines = 0
+        self.input_tokens = 0
+
+    def add(self, message: str, service: str = "unknown", status: str = "info",
+            timestamp: float = 0.0, line: Optional[str] = None):
+        line = line or message
+        self.lines += 1
+        self.input_tokens += estimate_tokens(line)
+
+        tokens = tokenize(message)
+        if not tokens:
+            return
+        group = self._groups.setdefault((len(tokens), tokens[0]), [])
+
+        best, best_score = None, 0.0
+        for cluster in group:
+            same = sum(1 for t, o in zip(cluster.template, tokens) if t == o)
+            score = same / len(tokens)
+            if score > best_score:
+                best, best_score = cluster, score
+
+        if best is not None and best_score >= self.similarity:
+            best.absorb(tokens, service, status, line, timestamp)
+        else:
+            group.append(LogCluster(tokens, service, status, line, timestamp))
+
+    def extend(self, records: Iterable) -> "LogReducer":
+        """Adds `log_context.LogRecord`s."""
+        for r in records:
+            self.add(r.message, r.service, r.status, r.timestamp, line=r.format())
+        return self
+
+    @property
+    def clusters(self) -> List[LogCluster]:
+        return [c for group in self._groups.values() for c in group]
+
+    def ranked(self) -> List[LogCluster]:
+        def novelty(cluster: LogCluster) -> float:
+            # Templates recurring across past alerts are background noise; unseen ones score 1.0
+            seen = self.history.seen(cluster.template_text()) if self.history else 0
+            return 1.0 / (1 + seen)
+
+        return sorted(self.clusters, key=lambda c: (-c.severity, -novelty(c), -c.count, -c.last_seen))
+
+    def render(self, token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+        """`log_snippets` block: one summary line per cluster, plus an example for the top clusters."""
+        ranked = self.ranked()
+        out: List[str] = []
+        used = 0
+        shown = 0
+        for cluster in ranked:
+            services = ",".join(sorted(cluster.services))
+            entry = [f"[x{cluster.count}] {cluster.status.upper()} {services}: {cluster.template_text()}"]
+            if cluster.count > 1 or WILDCARD in cluster.template:
+                entry.append(f"  e.g. {cluster.examples[0]}")
+            cost = estimate_tokens("\n".join(entry))
+            if used + cost > token_budget and len(entry) > 1:
+                entry = entry[:1]
+                cost = estimate_tokens(entry[0])
+            if used + cost > token_budget:
+                break
+            out.extend(entry)
+            used += cost
+            shown += 1
+
+        if shown < len(ranked):
+            omitted = sum(c.count for c in ranked[shown:])
+            out.append(f"(+{len(ranked) - shown} more patterns, {omitted} lines omitted)")
+
+        if self.history:
+            for cluster in ranked:
+                self.history.record(cluster.template_text())
+        return "\n".join(out)
+
+
+class TemplateHistory:
+    """
+    Bounded LRU of templates seen in previous alerts, for novelty ranking.
+    Thread-safe: reductions run in worker threads (asyncio.to_thread) and share one history.
+    """
+
+    def __init__(self, max_templates: int = MAX_KNOWN_TEMPLATES):
+        self.max_templates = max_templates
+        self._seen: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, template: str) -> int:
+        with self._lock:
+            return self._seen.get(template, 0)
+
+    def record(self, template: str):
+        with self._lock:
+            self._seen[template] = self._seen.get(template, 0) + 1
+            self._seen.move_to_end(template)
+            while len(self._seen) > self.max_templates:
+                self._seen.popitem(last=False)
+
+
+template_history = TemplateHistory()
+
+LOG_SNIPPET_TOKEN_BUDGET = int(os.getenv("LOG_SNIPPET_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+
+
+def reduce_records(records: Iterable, token_budget: int = LOG_SNIPPET_TOKEN_BUDGET) -> str:
+    """Clusters records into a budgeted snippet block and reports input vs. output token sizes."""
+    reducer = LogReducer(history=template_history).extend(records)
+    snippet = reducer.render(token_budget)
+    output_tokens = estimate_tokens(snippet)
+    try:
+        tags = ["service:sentinel-ai"]
+        metrics.gauge('echo_ops.logs.snippet.tokens', reducer.input_tokens, tags=tags + ["stage:input"])
+        metrics.gauge('echo_ops.logs.snippet.tokens', output_tokens, tags=tags + ["stage:output"])
+        metrics.gauge('echo_ops.logs.snippet.clusters', len(reducer.clusters), tags=tags)
+    except Exception:
+        pass
+    logger.info(f"Log snippets: {reducer.lines} lines -> {len(reducer.clusters)} patterns, "
+                f"~{reducer.input_tokens} -> ~{output_tokens} tokens")
+    return snippet
@@ -0,0 +1,120 @@
+import os
+import asyncio
+import logging
+import threading
+from typing import Optional, Dict, List, Tuple, Any
+
+from datadog import statsd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 10.0  # Matches the Agent's own 10s flush, so no resolution is lost
+
+# Gemini 2.5 Flash Lite list price (USD per 1K tokens)
+COST_PER_1K_INPUT = 0.0001
+COST_PER_1K_OUTPUT = 0.0002
+
+_Key = Tuple[str, Tuple[str, ...]]
+
+
+class MetricsAggregator:
+    """
+    In-process aggregation in front of DogStatsD.
+
+    Counters are summed and gauges keep their last value per (name, tags) until the next flush,
+    which sends everything in one buffered batch instead of one UDP packet per call.
+    Gauge semantics are unchanged: the Agent only keeps the last value per flush interval anyway.
+    """
+
+    def __init__(self, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counts: Dict[_Key, float] = {}
+        self._gauges: Dict[_Key, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(name: str, tags: Optional[List[str]]) -> _Key:
+        return name, tuple(sorted(tags or ()))
+
+    def increment(self, name: str, value: float = 1, tags: Optional[List[str]] = None):
+        if self.flush_interval <= 0:
+            statsd.increment(name, value=value, tags=tags)
+            return
+        key = self._key(name, tags)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, tags: Optional[List[str]] = None):
+        if self.flush_interval <= 0:
+            statsd.gauge(name, value, tags=tags)
+            return
+        with self._lock:
+            self._gauges[self._key(name, tags)] = value
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            gauges, self._gauges = self._gauges, {}
+        if not counts and not gauges:
+            return
+        try:
+            statsd.open_buffer()
+            try:
+                for (name, tags), value in counts.items():
+                    statsd.increment(name, value=value, tags=list(tags))
+                for (name, tags), value in gauges.items():
+                    statsd.gauge(name, value, tags=list(tags))
+            finally:
+                statsd.close_buffer()
+        except Exception as e:
+            logger.warning(f"Metrics flush failed: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    def start(self):
+        if self.flush_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.flush()
+
+
+metrics = MetricsAggregator(flush_interval=float(os.getenv("METRICS_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for when no tokenizer output is available."""
+    return len(text) // 4
+
+
+def record_llm_usage(chain: str, model: str, usage: Optional[Dict[str, Any]], fallback_text: str = ""):
+    """
+    Token and cost telemetry for one LLM call, from the response's usage metadata.
+    Falls back to a length estimate (tagged source:estimate) if the provider reported none.
+    """
+    if usage and usage.get("input_tokens") is not None:
+        input_tokens = int(usage.get("input_tokens") or 0)
+        output_tokens = int(usage.get("output_tokens") or 0)
+        source = "usage_metadata"
+    else:
+        input_tokens = estimate_tokens(fallback_text)
+        output_tokens = 50
+        source = "estimate"
+
+    tags = [f"model:{model}", f"chain:{chain}", f"source:{source}"]
+    metrics.increment('echo_ops.llm.tokens.prompt', value=input_tokens, tags=tags)
+    metrics.increment('echo_ops.llm.tokens.completion', value=output_tokens, tags=tags)
+    metrics.increment('echo_ops.llm.tokens.total', value=input_tokens + output_tokens, tags=tags)
+
+    cost = (input_tokens / 1000 * COST_PER_1K_INPUT) + (output_tokens / 1000 * COST_PER_1K_OUTPUT)
+    metrics.gauge('echo_ops.llm.cost', cost, tags=tags)
+
+    logger.info(f"Telemetry ({chain}): {input_tokens} in, {output_tokens} out, ${cost:.6f} [{source}]")
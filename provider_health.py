@@ -0,0 +1,189 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Optional, Dict, Deque, List, Any, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Recent calls kept per provider
+LATENCY_WINDOW = 50
+
+# Circuit breaker
+FAILURE_THRESHOLD = int(os.getenv("TTS_CIRCUIT_FAILURE_THRESHOLD", "3"))
+COOLDOWN_SECONDS = float(os.getenv("TTS_CIRCUIT_COOLDOWN_SECONDS", "30"))
+# Above this rolling error rate a provider is demoted behind healthier ones
+DEGRADED_ERROR_RATE = float(os.getenv("TTS_DEGRADED_ERROR_RATE", "0.5"))
+DEGRADED_MIN_SAMPLES = 3
+# Outcomes older than this stop counting, so a demoted provider gets retried once it goes quiet
+HEALTH_WINDOW_SECONDS = float(os.getenv("TTS_HEALTH_WINDOW_SECONDS", "120"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderStats:
+    """
+    Rolling latency/error statistics and circuit breaker for one TTS provider.
+
+    closed -> open after FAILURE_THRESHOLD consecutive failures.
+    open -> half_open once COOLDOWN_SECONDS have passed; a single probe request is let through.
+    half_open -> closed on probe success, back to open on probe failure.
+    """
+
+    def __init__(self, name: str, window: int = LATENCY_WINDOW):
+        self.name = name
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[Tuple[float, bool]] = deque(maxlen=window)  # (monotonic time, ok)
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.probe_in_flight = False
+        self.last_success_at: Optional[float] = None
+        self.last_failure_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    # --- Outcomes ---
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.latencies.append(latency)
+            self.outcomes.append((time.monotonic(), True))
+            self.last_success_at = time.time()
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self, latency: float):
+        with self._lock:
+            self.outcomes.append((time.monotonic(), False))
+            self.last_failure_at = time.time()
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= FAILURE_THRESHOLD):
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def release(self):
+        """Call ended without a verdict (e.g. a cancelled hedge loser)."""
+        with self._lock:
+            self.probe_in_flight = False
+
+    # --- Routing ---
+
+    def available(self) -> bool:
+        """Would a request be let through right now? (Does not claim the half-open probe.)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= COOLDOWN_SECONDS
+            return not self.probe_in_flight
+
+    def acquire(self) -> bool:
+        """Admit one request; in half-open state only a single probe is admitted at a time."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= COOLDOWN_SECONDS:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def _recent_outcomes(self) -> List[bool]:
+        cutoff = time.monotonic() - HEALTH_WINDOW_SECONDS
+        return [ok for ts, ok in list(self.outcomes) if ts >= cutoff]
+
+    @property
+    def error_rate(self) -> float:
+        recent = self._recent_outcomes()
+        if not recent:
+            return 0.0
+        return recent.count(False) / len(recent)
+
+    @property
+    def degraded(self) -> bool:
+        recent = self._recent_outcomes()
+        return len(recent) >= DEGRADED_MIN_SAMPLES and recent.count(False) / len(recent) > DEGRADED_ERROR_RATE
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Successful-call latency at quantile q (0..1) over the window, or None with no samples."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        idx = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[idx]
+
+    def score(self) -> float:
+        """Expected cost of a call (lower is healthier): median latency inflated by the error rate."""
+        p50 = self.percentile(0.5)
+        if p50 is None:
+            p50 = 1.0  # Unknown providers look average
+        return p50 / max(1.0 - self.error_rate, 0.05)
+
+    def _transition(self, state: str):
+        logger.warning(f"TTS provider {self.name}: circuit {self.state} -> {state}")
+        self.state = state
+        try:
+            metrics.increment('echo_ops.tts.provider.circuit', tags=[
+                "service:sentinel-ai", f"provider:{self.name}", f"state:{state}"
+            ])
+        except Exception:
+            pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p90 = self.percentile(0.5), self.percentile(0.9)
+        return {
+            "circuit": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": round(self.error_rate, 3),
+            "samples": len(self._recent_outcomes()),
+            "degraded": self.degraded,
+            "latency_p50": round(p50, 3) if p50 is not None else None,
+            "latency_p90": round(p90, 3) if p90 is not None else None,
+            "score": round(self.score(), 3),
+            "last_success_at": self.last_success_at,
+            "last_failure_at": self.last_failure_at,
+        }
+
+
+class ProviderRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._providers: Dict[str, ProviderStats] = {}
+
+    def get(self, name: str) -> ProviderStats:
+        with self._lock:
+            stats = self._providers.get(name)
+            if stats is None:
+                stats = ProviderStats(name)
+                self._providers[name] = stats
+            return stats
+
+    def route(self, preference: List[str]) -> List[str]:
+        """
+        Providers to try, in order. Open circuits are skipped; healthy providers keep the
+        caller's preference order, degraded ones (high error rate) follow, healthiest first.
+        """
+        healthy, degraded = [], []
+        for name in preference:
+            stats = self.get(name)
+            if not stats.available():
+                continue
+            (degraded if stats.degraded else healthy).append(name)
+        return healthy + sorted(degraded, key=lambda n: self.get(n).score())
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            providers = dict(self._providers)
+        return {name: stats.snapshot() for name, stats in providers.items()}
+
+
+provider_registry = ProviderRegistry()
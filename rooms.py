@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from shared_state import SharedState, shared_state, DEFAULT_ROOM
+from status_broadcaster import StatusBroadcaster, STATUS_PATH
+from audio_queue import AudioJobQueue, AudioJob, PRIORITY_COMMAND, DEFAULT_WORKERS, DEFAULT_MAX_DEPTH
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IDLE_SECONDS = 900.0
+DEFAULT_MAX_ROOMS = 1000
+WATCH_INTERVAL = float(os.getenv("STATUS_WATCH_INTERVAL", "0.5"))
+SWEEP_INTERVAL = 30.0
+
+_ROOM_ID = re.compile(r"^[a-z0-9][a-z0-9_\-]{0,63}$")
+# Closes of evicted rooms still in progress
+_background: set = set()
+
+
+def normalize_room(room_id: Optional[str]) -> str:
+    """Canonical room id (lowercase slug); None/blank means the default room. Raises ValueError."""
+    room_id = (room_id or "").strip().lower()
+    if not room_id:
+        return DEFAULT_ROOM
+    if not _ROOM_ID.match(room_id):
+        raise ValueError(f"Invalid room id '{room_id}'")
+    return room_id
+
+
+def _alert_tags(payload: Dict[str, Any]) -> List[str]:
+    tags = payload.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return [str(t).strip().lower() for t in tags if str(t).strip()]
+
+
+class Room:
+    """
+    One war room: its own status stream (versioned, shared across workers) and its own audio
+    queue, so a SitRep or command in one room never supersedes or overwrites another's.
+    The queue's workers start with the room's first audio job and run until the room is closed
+    (idle sweep or eviction).
+    """
+
+    def __init__(self, room_id: str, state: SharedState, workers: int, max_depth: int):
+        self.room_id = room_id
+        self.broadcaster = StatusBroadcaster(
+            state, room=room_id, status_path=STATUS_PATH if room_id == DEFAULT_ROOM else None
+        )
+        self.audio_queue = AudioJobQueue(workers=workers, max_depth=max_depth, tags=[f"room:{room_id}"])
+        self.last_active = time.monotonic()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def publish(self, status: Dict[str, Any]):
+        self.touch()
+        self.broadcaster.publish(status)
+
+    def submit(self, fn: Callable[..., Awaitable[Any]], *args, priority: int = PRIORITY_COMMAND,
+               on_drop: Optional[Callable[[], None]] = None, **kwargs) -> Optional[AudioJob]:
+        """Queues an audio job in this room (`fn` also receives `room=<room id>`)."""
+        self.touch()
+        self.audio_queue.start()
+        return self.audio_queue.submit(fn, *args, priority=priority, on_drop=on_drop, room=self.room_id, **kwargs)
+
+    def is_idle(self, idle_seconds: float) -> bool:
+        return (
+            self.room_id != DEFAULT_ROOM
+            and self.broadcaster.subscriber_count == 0
+            and self.audio_queue.idle
+            and not self.broadcaster.writes_pending
+            and time.monotonic() - self.last_active > idle_seconds
+        )
+
+    async def close(self):
+        await self.audio_queue.stop()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "version": self.broadcaster.version,
+            "subscribers": self.broadcaster.subscriber_count,
+            "queue_depth": self.audio_queue.depth,
+            "idle_seconds": round(time.monotonic() - self.last_active, 1),
+        }
+
+
+class RoomRegistry:
+    """
+    Rooms loaded in this worker, created on first use and evicted once idle.
+    Status history lives in shared state, so an evicted room resumes where it left off.
+
+    Alerts are routed by, in order: an explicit `room` field, a `room:<id>` tag, the first
+    ROOM_ROUTES rule matching a `monitor:<id>` or any of the alert's tags, else the default room.
+    """
+
+    def __init__(self, state: SharedState, routes: Optional[Dict[str, str]] = None,
+                 idle_seconds: float = DEFAULT_IDLE_SECONDS, max_rooms: int = DEFAULT_MAX_ROOMS,
+                 queue_workers: int = DEFAULT_WORKERS, queue_max_depth: int = DEFAULT_MAX_DEPTH):
+        self.state = state
+        self.routes = {k.strip().lower(): normalize_room(v) for k, v in (routes or {}).items()}
+        self.idle_seconds = idle_seconds
+        self.max_rooms = max_rooms
+        self.queue_workers = queue_workers
+        self.queue_max_depth = queue_max_depth
+        self._rooms: "OrderedDict[str, Room]" = OrderedDict()
+        self._relay_version = 0
+        self._watch_task: Optional[asyncio.Task] = None
+
+    # --- Lookup ---
+
+    def get(self, room_id: Optional[str] = None) -> Room:
+        room_id = normalize_room(room_id)
+        room = self._rooms.get(room_id)
+        if room is None:
+            if len(self._rooms) >= self.max_rooms:
+                self._evict_one()
+            room = Room(room_id, self.state, self.queue_workers, self.queue_max_depth)
+            room.broadcaster.load_or_init(create_default=room_id == DEFAULT_ROOM)
+            self._rooms[room_id] = room
+            self._gauge_rooms()
+        self._rooms.move_to_end(room_id)
+        room.touch()
+        return room
+
+    def route_alert(self, payload: Dict[str, Any]) -> str:
+        """Room id for a Datadog webhook payload."""
+        if payload.get("room"):
+            try:
+                return normalize_room(str(payload["room"]))
+            except ValueError as e:
+                logger.warning(f"{e}; routing alert by tags instead")
+        tags = _alert_tags(payload)
+        for tag in tags:
+            if tag.startswith("room:"):
+                try:
+                    return normalize_room(tag[len("room:"):])
+                except ValueError:
+                    pass
+        monitor_id = payload.get("monitor_id") or payload.get("alert_id")
+        keys = ([f"monitor:{monitor_id}"] if monitor_id else []) + tags
+        for key in keys:
+            if key in self.routes:
+                return self.routes[key]
+        return DEFAULT_ROOM
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Loads the default room and starts relaying other workers' updates."""
+        self._relay_version = self.state.status_version()
+        self.get(DEFAULT_ROOM)
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            await asyncio.gather(self._watch_task, return_exceptions=True)
+            self._watch_task = None
+        await asyncio.gather(*(room.close() for room in self._rooms.values()), return_exceptions=True)
+
+    async def _watch(self):
+        last_sweep = time.monotonic()
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            try:
+                # One query covers every room; updates for rooms not loaded here are skipped
+                # (they are read from shared state if the room is opened later)
+                if self.state.status_version() > self._relay_version:
+                    for version, room_id, status in self.state.all_statuses_since(self._relay_version):
+                        room = self._rooms.get(room_id)
+                        if room is not None:
+                            room.broadcaster.deliver(version, status)
+                        self._relay_version = version
+            except Exception as e:
+                logger.warning(f"Status watch failed: {e}")
+
+            if time.monotonic() - last_sweep >= SWEEP_INTERVAL:
+                last_sweep = time.monotonic()
+                await self._sweep()
+
+    async def _sweep(self):
+        idle = [room for room in self._rooms.values() if room.is_idle(self.idle_seconds)]
+        for room in idle:
+            del self._rooms[room.room_id]
+            await room.close()
+        if idle:
+            logger.info(f"Closed {len(idle)} idle rooms ({len(self._rooms)} open).")
+            self._gauge_rooms()
+
+    def _evict_one(self):
+        # Least recently used room with nothing in flight; never the default room
+        for room_id, room in self._rooms.items():
+            if room.is_idle(0):
+                del self._rooms[room_id]
+                # Keep a reference: the loop only holds tasks weakly
+                task = asyncio.create_task(room.close())
+                _background.add(task)
+                task.add_done_callback(_background.discard)
+                return
+        logger.warning(f"Room limit ({self.max_rooms}) reached with every room busy; opening one more.")
+
+    def _gauge_rooms(self):
+        try:
+            metrics.gauge('echo_ops.rooms.open', len(self._rooms), tags=["service:sentinel-ai"])
+        except Exception:
+            pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "open": len(self._rooms),
+            "rooms": {room_id: room.snapshot() for room_id, room in self._rooms.items()},
+        }
+
+
+def _load_routes() -> Dict[str, str]:
+    raw = os.getenv("ROOM_ROUTES", "").strip()
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        logger.error(f"Ignoring unparseable ROOM_ROUTES: {e}")
+        return {}
+
+
+rooms = RoomRegistry(
+    shared_state,
+    routes=_load_routes(),
+    idle_seconds=float(os.getenv("ROOM_IDLE_SECONDS", DEFAULT_IDLE_SECONDS)),
+    max_rooms=int(os.getenv("ROOM_MAX", DEFAULT_MAX_ROOMS)),
+    queue_workers=int(os.getenv("AUDIO_QUEUE_WORKERS", DEFAULT_WORKERS)),
+    queue_max_depth=int(os.getenv("AUDIO_QUEUE_MAX_DEPTH", DEFAULT_MAX_DEPTH)),
+)
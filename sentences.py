@@ -0,0 +1,79 @@
+import re
+from typing import Optional, List
+
+DEFAULT_MIN_CHARS = 24
+# Emit a clause anyway once the buffer grows this long without a sentence end
+DEFAULT_MAX_CHARS = 300
+
+_BOUNDARY = re.compile(r"[.!?]+[\"')\]]*\s+|\n+")
+_CLAUSE = re.compile(r"[,;:]\s+")
+# Words whose trailing period doesn't end a sentence
+_ABBREVIATIONS = {"e.g.", "i.e.", "vs.", "etc.", "approx.", "dr.", "mr.", "ms.", "no.", "v."}
+
+
+class SentenceSplitter:
+    """
+    Incremental sentence segmentation of a token stream.
+    `feed` returns the sentences completed by a chunk; `flush` returns whatever remains.
+    Sentences shorter than `min_chars` are merged into the next; ones longer than `max_chars`
+    are cut at a clause boundary (else a space).
+    """
+
+    def __init__(self, min_chars: int = DEFAULT_MIN_CHARS, max_chars: int = DEFAULT_MAX_CHARS):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+        self._scanned = 0
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        out = []
+        while True:
+            cut = self._next_cut()
+            if cut is None:
+                break
+            sentence, self._buffer = self._buffer[:cut].strip(), self._buffer[cut:]
+            self._scanned = 0
+            if sentence:
+                out.append(sentence)
+        return out
+
+    def flush(self) -> List[str]:
+        sentence, self._buffer, self._scanned = self._buffer.strip(), "", 0
+        return [sentence] if sentence else []
+
+    def _next_cut(self) -> Optional[int]:
+        for m in _BOUNDARY.finditer(self._buffer, self._scanned):
+            head = self._buffer[:m.end()]
+            last_word = head.split()[-1].lower() if head.split() else ""
+            if last_word in _ABBREVIATIONS or len(head.strip()) < self.min_chars:
+                continue
+            if len(head) > self.max_chars:
+                break
+            return m.end()
+        if len(self._buffer) > self.max_chars:
+            # Runaway sentence: cut at the last clause boundary, else the last space
+            clauses = list(_CLAUSE.finditer(self._buffer, 0, self.max_chars))
+            if clauses:
+                return clauses[-1].end()
+            space = self._buffer.rfind(" ", 0, self.max_chars)
+            return space + 1 if space > 0 else self.max_chars
+        # Nothing complete yet; later chunks only need the tail rescanned
+        self._scanned = max(len(self._buffer) - 8, 0)
+        return None
+
+
+def chunk_text(text: str, max_chars: int) -> List[str]:
+    """
+    Splits `text` into pieces of at most ~`max_chars`, packing whole sentences together and
+    only breaking inside a sentence (at a clause, else a word) when it alone is too long.
+    """
+    splitter = SentenceSplitter(min_chars=1, max_chars=max_chars)
+    sentences = splitter.feed(text) + splitter.flush()
+    chunks: List[str] = []
+    for sentence in sentences:
+        if chunks and len(chunks[-1]) + 1 + len(sentence) <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {sentence}"
+        else:
+            chunks.append(sentence)
+    return chunks
@@ -0,0 +1,133 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Optional, List, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_WINDOW_MS = 25
+DEFAULT_MAX_BATCH = 32
+
+
+def _warm() -> bool:
+    """Loads TextBlob's pattern lexicon (the first .sentiment call pays this otherwise)."""
+    from textblob import TextBlob
+    TextBlob("warm up").sentiment
+    return True
+
+
+def _score_batch(texts: List[str]) -> List[float]:
+    """Polarity for each text. Runs in the executor; module-level so a process pool can pickle it."""
+    from textblob import TextBlob
+    return [TextBlob(text).sentiment.polarity for text in texts]
+
+
+class SentimentScorer:
+    """
+    Off-loop TextBlob scoring with micro-batching.
+
+    Transcripts arriving within a short window are scored together in a single executor call,
+    so the event loop never runs TextBlob and bursts cost one dispatch instead of many.
+    """
+
+    def __init__(self, mode: str = "thread", batch_window_ms: float = DEFAULT_BATCH_WINDOW_MS,
+                 max_batch: int = DEFAULT_MAX_BATCH):
+        self.mode = mode
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = max_batch
+        self._executor: Optional[Executor] = None
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._background: set = set()
+        self._warmup: Optional[asyncio.Future] = None
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self._executor is not None:
+            return
+        if self.mode == "process":
+            self._executor = ProcessPoolExecutor(max_workers=1)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sentiment")
+        # Warm the lexicon in the background; early requests just queue behind it
+        self._warmup = asyncio.get_running_loop().run_in_executor(self._executor, _warm)
+
+    async def wait_warm(self):
+        """Resolves once the lexicon is loaded (raises if loading failed)."""
+        if self._warmup is None:
+            self.start()
+        await self._warmup
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._warmup = None
+
+    # --- Scoring ---
+
+    async def score(self, text: str) -> float:
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self.start()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    def score_in_background(self, text: str, tags: Optional[List[str]] = None):
+        """Fire-and-forget: scores and reports `ai.agent.sentiment` without holding up the request."""
+        task = asyncio.create_task(self._score_and_report(text, tags or ["service:sentinel-ai"]))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _score_and_report(self, text: str, tags: List[str]):
+        try:
+            polarity = await self.score(text)
+            metrics.gauge('ai.agent.sentiment', polarity, tags=tags)
+            logger.info(f"Sentiment Analysis: {polarity} for '{text}'")
+        except Exception as e:
+            logger.error(f"Sentiment Analysis Failed: {e}")
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            # Keep a reference: the loop only holds tasks weakly
+            task = asyncio.create_task(self._run_batch(batch))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        loop = asyncio.get_running_loop()
+        try:
+            scores = await loop.run_in_executor(self._executor, _score_batch, [text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        try:
+            metrics.gauge('ai.agent.sentiment.batch_size', len(batch), tags=["service:sentinel-ai"])
+        except Exception:
+            pass
+        for (_, future), polarity in zip(batch, scores):
+            if not future.done():
+                future.set_result(polarity)
+
+
+sentiment_scorer = SentimentScorer(
+    mode=os.getenv("SENTIMENT_EXECUTOR", "thread").lower().strip(),
+    batch_window_ms=float(os.getenv("SENTIMENT_BATCH_WINDOW_MS", DEFAULT_BATCH_WINDOW_MS)),
+    max_batch=int(os.getenv("SENTIMENT_MAX_BATCH", DEFAULT_MAX_BATCH)),
+)
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Optional, Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(".cache", "state.db")
+DEFAULT_STATUS_HISTORY = 256  # per room
+DEFAULT_ROOM = "default"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS flags (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS status_events (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    room TEXT NOT NULL DEFAULT 'default',
+    body TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class SharedState:
+    """
+    Cross-process state for running several uvicorn/gunicorn workers per container.
+
+    Backed by SQLite in WAL mode: readers never block the writer, and every worker sees the same
+    flags and the same status sequence. Status updates are versioned by an AUTOINCREMENT key, so
+    versions only ever increase, even after old entries are pruned.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, status_history: int = DEFAULT_STATUS_HISTORY):
+        self.path = path
+        self.status_history = status_history
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(status_events)")}
+        if "room" not in columns:
+            # Databases created before status was scoped to rooms
+            conn.execute("ALTER TABLE status_events ADD COLUMN room TEXT NOT NULL DEFAULT 'default'")
+        conn.execute("CREATE INDEX IF NOT EXISTS status_events_room ON status_events (room, version)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Flags ---
+
+    def get_flag(self, name: str, default: Any = None) -> Any:
+        row = self._conn().execute("SELECT value FROM flags WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_flag(self, name: str, value: Any):
+        self._conn().execute(
+            "INSERT INTO flags (name, value, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+            (name, json.dumps(value), time.time()),
+        )
+
+    # --- Status ---
+
+    def append_status(self, status: Dict[str, Any], room: str = DEFAULT_ROOM, mirror_path: Optional[str] = None) -> int:
+        """
+        Records a status update for `room` and returns its version.
+        Versions come from one sequence shared by all rooms: increasing within a room, not contiguous.
+        `mirror_path` (status.json for polling consoles) is rewritten by atomic rename inside the
+        write transaction, so the file always holds a complete document of the newest version.
+        """
+        conn = self._conn()
+        body = json.dumps(status)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(
+                "INSERT INTO status_events (room, body, created_at) VALUES (?, ?, ?)", (room, body, time.time())
+            )
+            version = cur.lastrowid
+            conn.execute(
+                "DELETE FROM status_events WHERE room = ? AND version <= "
+                "(SELECT version FROM status_events WHERE room = ? ORDER BY version DESC LIMIT 1 OFFSET ?)",
+                (room, room, self.status_history),
+            )
+            if mirror_path:
+                _atomic_write(mirror_path, body)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return version
+
+    def latest_status(self, room: str = DEFAULT_ROOM) -> Tuple[int, Optional[Dict[str, Any]]]:
+        row = self._conn().execute(
+            "SELECT version, body FROM status_events WHERE room = ? ORDER BY version DESC LIMIT 1", (room,)
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else (0, None)
+
+    def status_version(self) -> int:
+        """Newest version across all rooms."""
+        row = self._conn().execute("SELECT MAX(version) FROM status_events").fetchone()
+        return row[0] or 0
+
+    def statuses_since(self, version: int, room: str = DEFAULT_ROOM) -> List[Tuple[int, Dict[str, Any]]]:
+        rows = self._conn().execute(
+            "SELECT version, body FROM status_events WHERE room = ? AND version > ? ORDER BY version", (room, version)
+        ).fetchall()
+        return [(v, json.loads(body)) for v, body in rows]
+
+    def all_statuses_since(self, version: int, limit: int = 1000) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """(version, room, status) for every room, oldest first."""
+        rows = self._conn().execute(
+            "SELECT version, room, body FROM status_events WHERE version > ? ORDER BY version LIMIT ?", (version, limit)
+        ).fetchall()
+        return [(v, room, json.loads(body)) for v, room, body in rows]
+
+
+def _atomic_write(path: str, content: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+shared_state = SharedState(
+    path=os.getenv("SHARED_STATE_PATH", DEFAULT_PATH),
+    status_history=int(os.getenv("SHARED_STATE_STATUS_HISTORY", DEFAULT_STATUS_HISTORY)),
+)
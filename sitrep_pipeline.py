@@ -0,0 +1,31 @@
+import os
+import logging
+from typing import Optional, Dict, Any, AsyncIterator, Callable
+
+from sentences import SentenceSplitter
+
+logger = logging.getLogger(__name__)
+
+# SITREP_PIPELINE=true streams the SitRep from the LLM and speaks it sentence by sentence
+SITREP_PIPELINE = os.getenv("SITREP_PIPELINE", "false").lower().strip() in ("true", "1", "yes")
+# Shorter sentences are merged into the next one (a TTS call per "Attention." costs more than it saves)
+MIN_SENTENCE_CHARS = int(os.getenv("SITREP_MIN_SENTENCE_CHARS", "24"))
+
+
+async def astream_sentences(chain, inputs: Dict[str, Any],
+                            on_complete: Optional[Callable[[Any], None]] = None) -> AsyncIterator[str]:
+    """
+    Streams `chain` (prompt | chat model) and yields each sentence as soon as it is complete.
+    `on_complete` receives the aggregated message (with usage metadata) once the stream ends.
+    """
+    splitter = SentenceSplitter(min_chars=MIN_SENTENCE_CHARS)
+    message = None
+    async for chunk in chain.astream(inputs):
+        message = chunk if message is None else message + chunk
+        content = chunk.content if isinstance(chunk.content, str) else ""
+        for sentence in splitter.feed(content):
+            yield sentence
+    for sentence in splitter.flush():
+        yield sentence
+    if on_complete and message is not None:
+        on_complete(message)
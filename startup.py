@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable, Awaitable, List, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# "eager" imports every provider SDK at module load (the original behaviour);
+# "lazy" defers langchain / google-genai until first use or background warmup.
+STARTUP_MODE = os.getenv("STARTUP_MODE", "eager").lower().strip()
+LAZY_IMPORTS = STARTUP_MODE == "lazy"
+
+
+def ddtrace_bootstrapped() -> bool:
+    """True when launched under `ddtrace-run`, which has already patched everything."""
+    return "ddtrace.bootstrap.sitecustomize" in sys.modules
+
+
+class StartupTracker:
+    """
+    Cold-start bookkeeping: time spent importing heavy modules and in each warmup stage,
+    and whether the background warmup has finished (backs `/ready`).
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.imports: Dict[str, float] = {}
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.ready_after: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_after is not None
+
+    @contextmanager
+    def timed_import(self, name: str):
+        """Times the first (cold) import of `name`; later uses are free module-cache hits."""
+        if name in self.imports:
+            yield
+            return
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            self.imports[name] = elapsed
+            self._gauge('echo_ops.startup.import', elapsed, f"module:{name}")
+
+    def start_warmup(self, stages: List[Tuple[str, Callable[[], Awaitable[Any]]]]):
+        """Runs the warmup stages in order in the background; `/ready` flips when all have finished."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._warm(stages))
+
+    async def _warm(self, stages: List[Tuple[str, Callable[[], Awaitable[Any]]]]):
+        for name, stage in stages:
+            start = time.monotonic()
+            try:
+                await stage()
+                self.stages[name] = {"ok": True}
+            except Exception as e:
+                # A failed stage doesn't block readiness: the request path retries on first use
+                logger.warning(f"Warmup stage '{name}' failed: {e}")
+                self.stages[name] = {"ok": False, "error": str(e)}
+            elapsed = time.monotonic() - start
+            self.stages[name]["seconds"] = round(elapsed, 3)
+            self._gauge('echo_ops.startup.warmup', elapsed, f"stage:{name}")
+
+        self.ready_after = time.monotonic() - self.started_at
+        self._gauge('echo_ops.startup.ready', self.ready_after, f"mode:{STARTUP_MODE}")
+        logger.info(f"Warmup complete: ready {self.ready_after:.2f}s after import ({STARTUP_MODE} mode).")
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "mode": STARTUP_MODE,
+            "ready_after_seconds": round(self.ready_after, 3) if self.ready else None,
+            "imports": {name: round(seconds, 3) for name, seconds in self.imports.items()},
+            "stages": self.stages,
+        }
+
+    @staticmethod
+    def _gauge(name: str, value: float, tag: str):
+        try:
+            metrics.gauge(name, value, tags=["service:sentinel-ai", tag])
+        except Exception:
+            pass
+
+
+startup = StartupTracker()
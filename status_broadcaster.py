@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import bisect
+import asyncio
+import logging
+from collections import deque
+from typing import Optional, Dict, Any, Set, List, Tuple
+
+from shared_state import SharedState, DEFAULT_ROOM
+
+logger = logging.getLogger(__name__)
+
+STATUS_PATH = os.path.join("static", "status.json")
+SUBSCRIBER_QUEUE_SIZE = 16
+# Recent updates kept in memory for `/status?since=` catch-up
+EVENT_RING_SIZE = int(os.getenv("STATUS_EVENT_RING_SIZE", "256"))
+
+WAITING_STATUS = {"text": "Waiting for Signal...", "audio_available": False}
+
+
+class StatusBroadcaster:
+    """
+    Fan-out of one room's dashboard status updates.
+    Every publish is recorded in shared state (one version sequence for all workers; the default
+    room is also mirrored to status.json for consoles that fall back to polling) and goes to this
+    worker's live subscribers (SSE consoles). Updates published by other workers arrive via `deliver`.
+    Recording runs in a thread, one publish at a time, so versions follow publish order.
+    """
+
+    def __init__(self, state: SharedState, room: str = DEFAULT_ROOM, status_path: Optional[str] = None):
+        self.state = state
+        self.room = room
+        self.status_path = status_path
+        self.latest: Optional[Dict[str, Any]] = None
+        self.version = 0
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._events: "deque[Tuple[int, Dict[str, Any]]]" = deque(maxlen=EVENT_RING_SIZE)
+        # Newest version no longer in the ring (versions are shared across rooms, so not contiguous)
+        self._dropped_through = 0
+        self._changed = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self._background: set = set()
+
+    def load_or_init(self, create_default: bool = False):
+        """
+        Seed from shared state (or an existing status.json mirror).
+        Rooms without history start from an unrecorded placeholder unless `create_default` is set.
+        """
+        self.version, self.latest = self.state.latest_status(self.room)
+        if self.latest is not None:
+            history = self.state.statuses_since(0, self.room)[-EVENT_RING_SIZE:]
+            self._dropped_through = history[0][0] - 1 if history else 0
+            self._events.extend(history)
+            return
+        if self.status_path and os.path.exists(self.status_path):
+            try:
+                with open(self.status_path) as f:
+                    self.latest = json.load(f)
+                self.publish(self.latest)
+                return
+            except Exception as e:
+                logger.warning(f"Unreadable status.json, resetting: {e}")
+        # Shown until the first publish is recorded (or, without `create_default`, made)
+        self.latest = {**WAITING_STATUS, "timestamp": str(time.time())}
+        if create_default:
+            self.publish(self.latest)
+            logger.info(f"Created default status for room '{self.room}'")
+
+    def publish(self, status: Dict[str, Any]):
+        """Records and delivers `status` in the background (SQLite writes can wait on other workers)."""
+        # Keep a reference: the loop only holds tasks weakly
+        task = asyncio.create_task(self._record(status))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    @property
+    def writes_pending(self) -> bool:
+        return bool(self._background)
+
+    async def _record(self, status: Dict[str, Any]):
+        # The lock is FIFO, so publishes are recorded (and versioned) in the order they were made
+        async with self._write_lock:
+            try:
+                version = await asyncio.to_thread(
+                    self.state.append_status, status, room=self.room, mirror_path=self.status_path
+                )
+            except Exception as e:
+                # Still reach this worker's consoles; the update just isn't versioned
+                logger.error(f"Failed to record status: {e}")
+                self.latest = status
+                self._fan_out(status)
+                return
+            self.deliver(version, status)
+
+    def deliver(self, version: int, status: Dict[str, Any]):
+        """
+        Records a versioned update; the newest becomes current and goes to live subscribers.
+        The relay can hand over another worker's update after a newer local one: such a late
+        update is slotted into the ring in version order, so `since=` replays stay complete,
+        but isn't shown, since consoles already have something newer.
+        """
+        if version <= self.version:
+            self._insert_late(version, status)
+            return
+        if len(self._events) == self._events.maxlen:
+            self._dropped_through = self._events[0][0]
+        self._events.append((version, status))
+        self.version = version
+        self.latest = status
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        self._fan_out(status)
+
+    def _insert_late(self, version: int, status: Dict[str, Any]):
+        versions = [v for v, _ in self._events]
+        idx = bisect.bisect_left(versions, version)
+        if version <= self._dropped_through or (idx < len(versions) and versions[idx] == version):
+            return  # Already delivered, or older than the ring reaches
+        if len(self._events) == self._events.maxlen:
+            if idx == 0:
+                # Belongs before the oldest kept event: count it as dropped so older cursors resync
+                self._dropped_through = version
+                return
+            self._dropped_through = self._events.popleft()[0]
+            idx -= 1
+        self._events.insert(idx, (version, status))
+
+    def _fan_out(self, status: Dict[str, Any]):
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Slow console: drop its oldest pending update rather than block publishers
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(status)
+
+    # --- Versioned reads ---
+
+    def events_since(self, version: int) -> Tuple[List[Tuple[int, Dict[str, Any]]], bool]:
+        """
+        (events newer than `version`, complete). `complete` is False when the ring no longer
+        reaches back that far, i.e. the caller missed updates and should resync from the latest.
+        """
+        events = [(v, status) for v, status in self._events if v > version]
+        return events, version >= self._dropped_through
+
+    async def wait_for_update(self, version: int, timeout: float) -> bool:
+        """Waits until an update newer than `version` is delivered; False on timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.version <= version:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    # --- Subscribers ---
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        if self.latest is not None:
+            queue.put_nowait(self.latest)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
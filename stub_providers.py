@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import time
+import math
+import random
+import struct
+import asyncio
+import logging
+from typing import Optional, Dict, AsyncIterator
+
+from intent_parser import classify
+
+logger = logging.getLogger(__name__)
+
+# PROVIDER_MODE=stub swaps the Gemini LLM and both TTS providers for local stand-ins,
+# so the pipeline can be benchmarked with no network or API keys.
+PROVIDER_MODE = os.getenv("PROVIDER_MODE", "live").lower().strip()
+STUB_PROVIDERS = PROVIDER_MODE == "stub"
+
+STUB_SAMPLE_RATE = 24000
+SECONDS_PER_WORD = 0.35
+MAX_CLIP_SECONDS = 20.0
+STREAM_CHUNK_SECONDS = 0.25
+STREAM_FIRST_TOKEN_SHARE = 0.3  # Streamed stub LLM replies: share of the latency before the first token
+
+_seed = os.getenv("STUB_SEED")
+_rng = random.Random(int(_seed)) if _seed else random.Random()
+
+
+class StubProviderError(RuntimeError):
+    pass
+
+
+class LatencyProfile:
+    """
+    Latency distribution plus failure rate for one stand-in, from a spec like:
+      "fixed:0.2", "uniform:0.1:0.5", "normal:0.3:0.05" (mean, sd), "lognormal:0.3:0.6" (median, sigma)
+    """
+
+    def __init__(self, spec: str, failure_rate: float = 0.0):
+        self.spec = spec
+        self.failure_rate = failure_rate
+        kind, *params = spec.split(":")
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in params]
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution '{spec}'")
+
+    def sample(self) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            value = p[0]
+        elif self.kind == "uniform":
+            value = _rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            value = _rng.gauss(p[0], p[1])
+        else:
+            value = _rng.lognormvariate(math.log(p[0]), p[1])
+        return max(value, 0.0)
+
+    def fails(self) -> bool:
+        return self.failure_rate > 0 and _rng.random() < self.failure_rate
+
+    @classmethod
+    def from_env(cls, prefix: str, default_spec: str, fallback_prefix: Optional[str] = None) -> "LatencyProfile":
+        def env(suffix: str, default: str) -> str:
+            value = os.getenv(f"{prefix}_{suffix}")
+            if value is None and fallback_prefix:
+                value = os.getenv(f"{fallback_prefix}_{suffix}")
+            return default if value is None else value
+
+        return cls(env("LATENCY", default_spec), float(env("FAILURE_RATE", "0")))
+
+
+LLM_PROFILE = LatencyProfile.from_env("STUB_LLM", "lognormal:0.6:0.4")
+# STUB_TTS_* applies to both providers; STUB_ELEVENLABS_* / STUB_GEMINI_* override per provider
+TTS_PROFILES: Dict[str, LatencyProfile] = {
+    name: LatencyProfile.from_env(f"STUB_{name.upper()}", "lognormal:0.8:0.4", fallback_prefix="STUB_TTS")
+    for name in ("elevenlabs", "gemini")
+}
+
+
+# --- LLM ---
+
+_TRANSCRIPT = re.compile(r'User Voice Transcript: "(.*)"')
+_ALERT_TITLE = re.compile(r"Alert Title:\s*(.*)")
+_LOG_SNIPPETS = re.compile(r"Log Snippets:\s*(.*)")
+
+
+def stub_completion(prompt: str) -> str:
+    """Canned response for one of the service's prompts (intent JSON or SitRep)."""
+    transcript = _TRANSCRIPT.search(prompt)
+    if transcript:
+        intent, _ = classify(transcript.group(1))
+        if intent is None:
+            intent = {"tool_name": "refusal", "arguments": {"reason": "The command is unclear or unsafe."}}
+        return json.dumps(intent)
+
+    title = _ALERT_TITLE.search(prompt)
+    snippets = _LOG_SNIPPETS.search(prompt)
+    title = title.group(1).strip() if title else "an alert"
+    first_line = snippets.group(1).strip() if snippets else ""
+    evidence = f" Top log line: {first_line}." if first_line else ""
+    return f"Attention. {title}.{evidence} Investigating the affected service now."
+
+
+def build_stub_llm():
+    """A LangChain chat model (so `prompt | llm` chains work unchanged) answering via stub_completion."""
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    from langchain_core.messages import AIMessageChunk
+    from langchain_core.outputs import ChatGenerationChunk
+
+    def complete(messages):
+        if LLM_PROFILE.fails():
+            raise StubProviderError("Stub LLM injected failure")
+        prompt = "\n".join(str(m.content) for m in messages)
+        text = stub_completion(prompt)
+        input_tokens, output_tokens = len(prompt) // 4, len(text) // 4
+        return text, {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def respond(messages) -> ChatResult:
+        text, usage = complete(messages)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+    class StubChatModel(BaseChatModel):
+        @property
+        def _llm_type(self) -> str:
+            return "echo-ops-stub"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            time.sleep(LLM_PROFILE.sample())
+            return respond(messages)
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            await asyncio.sleep(LLM_PROFILE.sample())
+            return respond(messages)
+
+        async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+            # The sampled latency is split into time-to-first-token, then evenly paced words
+            latency = LLM_PROFILE.sample()
+            await asyncio.sleep(latency * STREAM_FIRST_TOKEN_SHARE)
+            text, usage = complete(messages)
+            words = re.findall(r"\S+\s*", text)
+            for i, word in enumerate(words):
+                last = i == len(words) - 1
+                yield ChatGenerationChunk(message=AIMessageChunk(content=word, usage_metadata=usage if last else None))
+                if not last:
+                    await asyncio.sleep(latency * (1 - STREAM_FIRST_TOKEN_SHARE) / len(words))
+
+    logger.info(f"Using stub LLM (latency {LLM_PROFILE.spec}, failure rate {LLM_PROFILE.failure_rate}).")
+    return StubChatModel()
+
+
+# --- TTS ---
+
+_TONE_CHUNK: Optional[bytes] = None
+
+
+def _tone_chunk() -> bytes:
+    """0.1 s of a quiet 440 Hz tone (a whole number of cycles, so chunks repeat seamlessly)."""
+    global _TONE_CHUNK
+    if _TONE_CHUNK is None:
+        n = STUB_SAMPLE_RATE // 10
+        samples = [int(2000 * math.sin(2 * math.pi * 440 * i / STUB_SAMPLE_RATE)) for i in range(n)]
+        _TONE_CHUNK = struct.pack(f"<{n}h", *samples)
+    return _TONE_CHUNK
+
+
+def stub_pcm(text: str) -> bytes:
+    """16-bit mono PCM whose duration tracks the text's spoken length."""
+    seconds = min(max(len(text.split()) * SECONDS_PER_WORD, 0.5), MAX_CLIP_SECONDS)
+    return _tone_chunk() * int(round(seconds * 10))
+
+
+def _attempt(provider: str) -> Optional[float]:
+    """Sampled latency, or None if this call is an injected failure."""
+    profile = TTS_PROFILES[provider]
+    if profile.fails():
+        logger.warning(f"Stub {provider} TTS: injected failure.")
+        return None
+    return profile.sample()
+
+
+async def agenerate(provider: str, text: str, wrap_wav) -> Optional[bytes]:
+    latency = _attempt(provider)
+    if latency is None:
+        return None
+    await asyncio.sleep(latency)
+    return wrap_wav(stub_pcm(text), STUB_SAMPLE_RATE)
+
+
+async def astream(provider: str, text: str, stream_header) -> AsyncIterator[bytes]:
+    """Open-ended WAV stream: header after the first-byte latency, then PCM paced at 4x real time."""
+    latency = _attempt(provider)
+    if latency is None:
+        return
+    await asyncio.sleep(latency)
+    yield stream_header(STUB_SAMPLE_RATE)
+    pcm = stub_pcm(text)
+    step = int(STUB_SAMPLE_RATE * 2 * STREAM_CHUNK_SECONDS)
+    for i in range(0, len(pcm), step):
+        yield pcm[i:i + step]
+        await asyncio.sleep(STREAM_CHUNK_SECONDS / 4)
@@ -30,6 +30,13 @@ SCENARIOS = [
     {"user": "dev_carol", "transcript": "Echo, this service is terrible! I'm extremely angry that it's refusing my connection!", "type": "frustrated"},
 ]
 
+# Alert payloads for /webhook/datadog in load mode (same incidents as trigger_incident.py)
+ALERT_SCENARIOS = [
+    {"event_title": "High Latency Detected", "body": "Latency > 500ms in PaymentGateway"},
+    {"event_title": "Error Rate Spike", "body": "Error rate > 5% in CheckoutService"},
+    {"event_title": "Database Connection Pool Exhausted", "body": "Active connections > 90%"},
+]
+
 def run_traffic():
     print(f"Starting Traffic Generator targeting {BASE_URL}...")
     
@@ -111,11 +118,230 @@ def run_chaos_test():
     except BaseException as e:
         print(f"\n>> Chaos shutdown interrupted or failed: {e}")
 
+class LatencyHistogram:
+    """
+    HDR-style latency histogram: log2 magnitude buckets, each split into linear sub-buckets,
+    so every recorded value keeps ~2 significant digits (<1% error) from 1us up to hours
+    with a few KB of counts. Histograms from separate runs or workers can be merged.
+    """
+
+    SUB_BUCKETS = 128
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.min_us = None
+        self.max_us = 0
+        self.sum_us = 0
+
+    def _index(self, us):
+        if us < self.SUB_BUCKETS:
+            return us
+        magnitude = us.bit_length() - 8  # keep the top 7 bits as the sub-bucket
+        return (magnitude + 1) * self.SUB_BUCKETS + ((us >> magnitude) - self.SUB_BUCKETS)
+
+    def _upper_bound(self, index):
+        if index < self.SUB_BUCKETS:
+            return index
+        magnitude = index // self.SUB_BUCKETS - 1
+        sub = index % self.SUB_BUCKETS + self.SUB_BUCKETS
+        return ((sub + 1) << magnitude) - 1
+
+    def record(self, seconds):
+        us = max(int(seconds * 1_000_000), 0)
+        idx = self._index(us)
+        self.counts[idx] = self.counts.get(idx, 0) + 1
+        self.total += 1
+        self.sum_us += us
+        self.min_us = us if self.min_us is None else min(self.min_us, us)
+        self.max_us = max(self.max_us, us)
+
+    def merge(self, other):
+        for idx, count in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + count
+        self.total += other.total
+        self.sum_us += other.sum_us
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, p):
+        """Latency in ms at percentile p (0-100)."""
+        if not self.total:
+            return 0.0
+        target = max(1, int(round(p / 100.0 * self.total + 0.5 - 1e-9)))
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= target:
+                return min(self._upper_bound(idx), self.max_us) / 1000.0
+        return self.max_us / 1000.0
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "min_ms": (self.min_us or 0) / 1000.0,
+            "mean_ms": round(self.sum_us / self.total / 1000.0, 3) if self.total else 0.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "p99.9_ms": self.percentile(99.9),
+            "max_ms": self.max_us / 1000.0,
+        }
+
+    def to_dict(self):
+        # Raw buckets too, so runs can be merged or re-analysed later
+        return {**self.summary(), "buckets": {str(k): v for k, v in sorted(self.counts.items())}}
+
+
+class EndpointStats:
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.statuses = {}
+        self.errors = 0
+
+    def record(self, latency, status):
+        self.histogram.record(latency)
+        key = str(status)
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        if not isinstance(status, int) or status >= 500:
+            self.errors += 1
+
+    def to_dict(self, duration):
+        return {
+            "throughput_rps": round(self.histogram.total / duration, 2) if duration else 0.0,
+            "errors": self.errors,
+            "statuses": self.statuses,
+            "latency": self.histogram.to_dict(),
+        }
+
+
+def _load_request(webhook_ratio):
+    """(endpoint, payload) drawn from the scenario mix."""
+    if random.random() < webhook_ratio:
+        alert = random.choice(ALERT_SCENARIOS)
+        alert_id = f"load-{random.getrandbits(48):x}"
+        return "/webhook/datadog", {
+            **alert,
+            # Distinct alert ids so the server's alert coalescing doesn't turn load into cache hits,
+            # and a distinct service so its alert gathering doesn't hold them for a shared batch
+            "alert_id": alert_id,
+            "event_type": "metric_alert",
+            "alert_query": f"avg(last_5m):sum:trace.flask.request.duration{{service:{alert_id}}} > 0.5",
+            "timestamp": "now",
+        }
+    scenario = random.choice(SCENARIOS)
+    return "/command", {"transcript": scenario["transcript"], "user_id": scenario["user"]}
+
+
+async def _run_load_async(rate, concurrency, duration, webhook_ratio, poisson, timeout):
+    import asyncio
+    import httpx
+
+    stats = {}
+    slots = asyncio.Semaphore(concurrency)
+    backlog = {"late": 0}
+
+    async def fire(client, intended_at):
+        endpoint, payload = _load_request(webhook_ratio)
+        async with slots:
+            if time.perf_counter() - intended_at > 0.01:
+                backlog["late"] += 1
+            try:
+                resp = await client.post(f"{BASE_URL}{endpoint}", json=payload)
+                status = resp.status_code
+            except Exception as e:
+                status = type(e).__name__
+        # Latency counts from the *scheduled* send time, so queueing behind a slow server is
+        # measured rather than hidden (no coordinated omission)
+        stats.setdefault(endpoint, EndpointStats()).record(time.perf_counter() - intended_at, status)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        tasks = []
+        start = time.perf_counter()
+        next_at = start
+        while next_at - start < duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(fire(client, next_at)))
+            next_at += random.expovariate(rate) if poisson else 1.0 / rate
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    return stats, elapsed, len(tasks), backlog["late"]
+
+
+def run_load_test(rate=10.0, concurrency=32, duration=60.0, webhook_ratio=0.1, poisson=True,
+                  timeout=30.0, output=None):
+    """
+    Open-loop load: requests are scheduled at the target arrival rate regardless of how fast the
+    service responds; `concurrency` caps in-flight requests (excess arrivals queue client-side).
+    Writes per-endpoint latency histograms and status counts as JSON.
+    """
+    import asyncio
+    import json
+    from datetime import datetime, timezone
+
+    print(f"Load test: {rate} req/s for {duration}s (concurrency {concurrency}, "
+          f"{webhook_ratio:.0%} webhooks) against {BASE_URL}...")
+    stats, elapsed, sent, late = asyncio.run(
+        _run_load_async(rate, concurrency, duration, webhook_ratio, poisson, timeout)
+    )
+
+    overall = LatencyHistogram()
+    for endpoint_stats in stats.values():
+        overall.merge(endpoint_stats.histogram)
+
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "target": BASE_URL,
+        "config": {
+            "rate": rate, "concurrency": concurrency, "duration": duration,
+            "webhook_ratio": webhook_ratio, "arrivals": "poisson" if poisson else "uniform",
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "requests": sent,
+        "late_starts": late,
+        "overall": overall.summary(),
+        "endpoints": {endpoint: s.to_dict(elapsed) for endpoint, s in sorted(stats.items())},
+    }
+
+    print(f"\n{'endpoint':<20}{'count':>7}{'err':>6}{'p50':>10}{'p90':>10}{'p99':>10}{'p99.9':>10}{'max':>10}")
+    for endpoint, s in sorted(stats.items()):
+        h = s.histogram.summary()
+        print(f"{endpoint:<20}{h['count']:>7}{s.errors:>6}{h['p50_ms']:>10.1f}{h['p90_ms']:>10.1f}"
+              f"{h['p99_ms']:>10.1f}{h['p99.9_ms']:>10.1f}{h['max_ms']:>10.1f}")
+    if late:
+        print(f"\n{late} of {sent} requests waited for a free slot; raise --concurrency if this is unintended.")
+
+    output = output or f"load_results_{int(time.time())}.json"
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+    return results
+
+
 if __name__ == "__main__":
-    # check for env argument or simple toggle
-    import sys
+    import argparse
+    parser = argparse.ArgumentParser(description="EchoOps traffic generator")
+    parser.add_argument("--chaos", action="store_true", help="Enable chaos mode and send a continuous burst")
+    parser.add_argument("--load", action="store_true", help="Open-loop load test with latency histograms")
+    parser.add_argument("--rate", type=float, default=10.0, help="Target arrivals per second (load mode)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Max in-flight requests (load mode)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of load (load mode)")
+    parser.add_argument("--webhook-ratio", type=float, default=0.1, help="Share of requests sent to /webhook/datadog")
+    parser.add_argument("--uniform", action="store_true", help="Evenly spaced arrivals instead of Poisson")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Results JSON path (default: load_results_<ts>.json)")
+    args = parser.parse_args()
+
     try:
-        if len(sys.argv) > 1 and sys.argv[1] == "--chaos":
+        if args.load:
+            run_load_test(args.rate, args.concurrency, args.duration, args.webhook_ratio,
+                          poisson=not args.uniform, timeout=args.timeout, output=args.output)
+        elif args.chaos:
             run_chaos_test()
         else:
             run_traffic()
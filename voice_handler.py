@@ -1,32 +1,138 @@
 import os
-import requests
+import io
+import wave
+import struct
+import time
+import asyncio
+import threading
+import httpx
 import logging
-from typing import Optional
+from typing import Optional, Dict, Any, List, AsyncIterator, Tuple, Callable, Awaitable
 
-# Google GenAI SDK
-from google import genai
-from google.genai import types
+from metrics import metrics
+from startup import startup, LAZY_IMPORTS
+
+# Google GenAI SDK (deferred to first use in lazy startup mode)
+if not LAZY_IMPORTS:
+    with startup.timed_import("google_genai"):
+        from google import genai  # noqa: F401
+        from google.genai import types  # noqa: F401
+
+from audio_cache import get_audio_cache, cache_key
+from audio_encoder import audio_encoder
+from audio_join import join_clips
+from sentences import chunk_text
+from provider_health import provider_registry
+import stub_providers
+from stub_providers import STUB_PROVIDERS
 
 logger = logging.getLogger(__name__)
 
 # Constants
 ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1"
 # "Adam" - Standard American / Deep Voice
-DEFAULT_VOICE_ID = "pNInz6obpgDQGcFmaJgB" 
+DEFAULT_VOICE_ID = "pNInz6obpgDQGcFmaJgB"
 FEMALE_VOICE_ID = "21m00Tcm4TlvDq8ikWAM" # "Rachel"
 MODEL_ID = "eleven_turbo_v2" # Low latency model
+# 32 kbps / 22 kHz MP3 is plenty for speech (the API default is 128 kbps / 44.1 kHz)
+ELEVENLABS_OUTPUT_FORMAT = os.getenv("ELEVENLABS_OUTPUT_FORMAT", "mp3_22050_32")
+GEMINI_TTS_MODEL = "gemini-2.5-flash-preview-tts"
+GEMINI_SAMPLE_RATE = 24000 # Standard for Gemini
+
+# Content type of each provider's streamed output
+STREAM_MEDIA_TYPES = {"elevenlabs": "audio/mpeg", "gemini": "audio/wav"}
+
+# Network budget per TTS call (seconds)
+TTS_CONNECT_TIMEOUT = float(os.getenv("TTS_CONNECT_TIMEOUT", "3.0"))
+TTS_TIMEOUT = float(os.getenv("TTS_TIMEOUT", "15.0"))
+
+# Hedged requests (opt-in): start the fallback provider when the primary runs past
+# this percentile of its recent latency.
+TTS_HEDGE = os.getenv("TTS_HEDGE", "false").lower().strip() in ("true", "1", "yes")
+TTS_HEDGE_PERCENTILE = float(os.getenv("TTS_HEDGE_PERCENTILE", "0.9"))
+TTS_HEDGE_MIN_SAMPLES = int(os.getenv("TTS_HEDGE_MIN_SAMPLES", "5"))
+TTS_HEDGE_DEFAULT_DELAY = float(os.getenv("TTS_HEDGE_DEFAULT_DELAY", "2.0"))
+
+# Text longer than this is split at sentence/clause boundaries and the chunks synthesized
+# in parallel (0 disables). Calls in flight per provider are capped across all requests.
+TTS_CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "300"))
+TTS_PROVIDER_CONCURRENCY = int(os.getenv("TTS_PROVIDER_CONCURRENCY", "4"))
+
+_aprovider_slots = {name: asyncio.Semaphore(TTS_PROVIDER_CONCURRENCY) for name in ("elevenlabs", "gemini")}
+
+
+# --- Shared Clients (process-wide, keep-alive) ---
+
+_http_client: Optional[httpx.AsyncClient] = None
+_genai_clients: Dict[str, Any] = {}
+_client_lock = threading.Lock()
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Pooled async HTTP client. Uses HTTP/2 when the `h2` package is installed."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        _http_client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(TTS_TIMEOUT, connect=TTS_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+        )
+    return _http_client
+
+
+def _genai_sdk():
+    """(genai, types) modules, imported on first use."""
+    with startup.timed_import("google_genai"):
+        from google import genai
+        from google.genai import types
+    return genai, types
+
+
+def _get_genai_client(api_key: str):
+    """One genai.Client per API key; its `.aio` transport is reused across calls."""
+    with _client_lock:
+        client = _genai_clients.get(api_key)
+        if client is None:
+            genai, _ = _genai_sdk()
+            client = genai.Client(api_key=api_key)
+            _genai_clients[api_key] = client
+        return client
 
 
-def _generate_elevenlabs(text: str, voice_id: str = DEFAULT_VOICE_ID) -> Optional[bytes]:
+async def warm_connections():
     """
-    Generates audio using ElevenLabs API.
-    Returns None if generation fails or key is missing.
+    Opens pooled provider connections ahead of the first clip (DNS, TLS and HTTP/2 setup),
+    using free metadata calls rather than synthesis.
     """
-    api_key = os.getenv("ELEVENLABS_API_KEY", "").strip()
-    if not api_key:
-        logger.warning("ElevenLabs skipped: API Key missing.")
-        return None
+    if STUB_PROVIDERS:
+        return
+    eleven_key = os.getenv("ELEVENLABS_API_KEY", "").strip()
+    if eleven_key:
+        await _get_http_client().get(f"{ELEVENLABS_API_URL}/models", headers={"xi-api-key": eleven_key})
 
+    google_key = os.getenv("GOOGLE_API_KEY", "").strip()
+    if google_key:
+        client = await asyncio.to_thread(_get_genai_client, google_key)
+        await client.aio.models.get(model=GEMINI_TTS_MODEL)
+
+
+async def close_clients():
+    """Release pooled connections (call on app shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    _genai_clients.clear()
+
+
+# --- Request Builders ---
+
+def _elevenlabs_request(text: str, voice_id: str, api_key: str):
     headers = {
         "Accept": "audio/mpeg",
         "Content-Type": "application/json",
@@ -43,120 +149,504 @@ def _generate_elevenlabs(text: str, voice_id: str = DEFAULT_VOICE_ID) -> Optiona
     }
 
     url = f"{ELEVENLABS_API_URL}/text-to-speech/{voice_id}"
+    return url, data, headers
+
+
+def _gemini_request(text: str):
+    _, types = _genai_sdk()
+    return dict(
+        model=GEMINI_TTS_MODEL,
+        contents=f"Please generate audio for the following text using a professional female voice: {text}",
+        config=types.GenerateContentConfig(
+            response_modalities=["AUDIO"]
+        )
+    )
+
+
+def _wrap_pcm_wav(raw_audio: bytes, sample_rate: int = GEMINI_SAMPLE_RATE) -> bytes:
+    """Wrap raw PCM in a WAV container (Mono, 16-bit)."""
+    wav_buffer = io.BytesIO()
+    with wave.open(wav_buffer, "wb") as wav_file:
+        wav_file.setnchannels(1) # Mono
+        wav_file.setsampwidth(2) # 16-bit
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(raw_audio)
+    return wav_buffer.getvalue()
+
+
+def wav_stream_header(sample_rate: int = GEMINI_SAMPLE_RATE) -> bytes:
+    """
+    WAV header for a stream of unknown length (Mono, 16-bit).
+    Sizes are set to the maximum so players keep reading until the connection closes.
+    """
+    unknown = 0xFFFFFFFF
+    return (
+        b"RIFF" + struct.pack("<I", unknown) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", unknown)
+    )
+
+
+def stream_media_type(provider: str) -> str:
+    if STUB_PROVIDERS:
+        return "audio/wav"
+    return STREAM_MEDIA_TYPES.get(provider, "application/octet-stream")
+
+
+def finalize_stream(provider: str, data: bytes) -> bytes:
+    """
+    Turns a completed stream into a self-contained clip (fixes the open-ended WAV header).
+    The result is still in the provider's format; pass it through `audio_encoder` before caching.
+    """
+    if data[:4] == b"RIFF" and data[4:8] == b"\xff\xff\xff\xff":
+        sample_rate = struct.unpack("<I", data[24:28])[0]
+        return _wrap_pcm_wav(data[len(wav_stream_header()):], sample_rate)
+    return data
+
+
+def _handle_elevenlabs_response(status_code: int, content: bytes, body_text: str) -> Optional[bytes]:
+    if status_code == 200:
+        logger.info(f"Generated voice audio via ElevenLabs ({len(content)} bytes).")
+        return content
+    elif status_code == 401:
+        logger.error("Audio generation failed: ElevenLabs authentication failed (401).")
+        return None
+    else:
+        logger.error(f"ElevenLabs API Error: {status_code} - {body_text}")
+        return None
+
+
+def _extract_gemini_audio(response) -> Optional[bytes]:
+    # Check if response has audio data
+    if response.candidates and response.candidates[0].content.parts:
+        for part in response.candidates[0].content.parts:
+            if part.inline_data and part.inline_data.mime_type.startswith("audio"):
+                raw_audio = part.inline_data.data
+                logger.info(f"Generated voice audio via Gemini ({len(raw_audio)} bytes). Wrapping in WAV.")
+                return _wrap_pcm_wav(raw_audio)
+
+    logger.warning("Gemini did not return audio data.")
+    return None
+
+
+def _log_gemini_exception(e: Exception):
+    # Check for auth errors in exception message as SDK might raise generic errors
+    if "401" in str(e) or "Unauthenticated" in str(e):
+        logger.error("Audio generation failed: Gemini authentication failed.")
+    else:
+        logger.error(f"Gemini generation exception: {e}")
+
+
+# --- Async Providers ---
+
+async def _agenerate_elevenlabs(text: str, voice_id: str = DEFAULT_VOICE_ID) -> Optional[bytes]:
+    """
+    Async ElevenLabs synthesis over the pooled keep-alive client.
+    Returns None if generation fails or key is missing.
+    """
+    api_key = os.getenv("ELEVENLABS_API_KEY", "").strip()
+    if not api_key:
+        logger.warning("ElevenLabs skipped: API Key missing.")
+        return None
+
+    url, data, headers = _elevenlabs_request(text, voice_id, api_key)
 
     try:
-        response = requests.post(url, json=data, headers=headers)
-        if response.status_code == 200:
-            logger.info(f"Generated voice audio via ElevenLabs ({len(response.content)} bytes).")
-            return response.content
-        elif response.status_code == 401:
-             logger.error("Audio generation failed: ElevenLabs authentication failed (401).")
-             return None
-        else:
-            logger.error(f"ElevenLabs API Error: {response.status_code} - {response.text}")
-            return None
+        response = await _get_http_client().post(
+            url, json=data, headers=headers, params={"output_format": ELEVENLABS_OUTPUT_FORMAT}
+        )
+        return _handle_elevenlabs_response(response.status_code, response.content, response.text)
     except Exception as e:
         logger.error(f"ElevenLabs generation exception: {e}")
         return None
 
-def _generate_gemini(text: str) -> Optional[bytes]:
+async def _agenerate_gemini(text: str) -> Optional[bytes]:
     """
-    Generates audio using Gemini Native Audio (via google-genai SDK).
+    Async Gemini Native Audio via the shared client's `.aio` interface.
     """
     api_key = os.getenv("GOOGLE_API_KEY", "").strip()
     if not api_key:
         logger.warning("Gemini Audio skipped: API Key missing.")
         return None
-    
+
     try:
-        client = genai.Client(api_key=api_key)
-        
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-tts",
-            contents=f"Please generate audio for the following text using a professional female voice: {text}",
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"]
-            )
+        client = _get_genai_client(api_key)
+        response = await asyncio.wait_for(
+            client.aio.models.generate_content(**_gemini_request(text)),
+            timeout=TTS_TIMEOUT,
         )
-        
-        # Check if response has audio data
-        if response.candidates and response.candidates[0].content.parts:
-            for part in response.candidates[0].content.parts:
-                if part.inline_data and part.inline_data.mime_type.startswith("audio"):
-                     raw_audio = part.inline_data.data
-                     logger.info(f"Generated voice audio via Gemini ({len(raw_audio)} bytes). Wrapping in WAV.")
-                     
-                     # Wrap in WAV container (24kHz, Mono, 16-bit)
-                     import io
-                     import wave
-                     
-                     wav_buffer = io.BytesIO()
-                     with wave.open(wav_buffer, "wb") as wav_file:
-                         wav_file.setnchannels(1) # Mono
-                         wav_file.setsampwidth(2) # 16-bit
-                         wav_file.setframerate(24000) # Standard for Gemini
-                         wav_file.writeframes(raw_audio)
-                         
-                     return wav_buffer.getvalue()
-        
-        logger.warning("Gemini did not return audio data.")
-        return None
+        return _extract_gemini_audio(response)
 
     except Exception as e:
-        # Check for auth errors in exception message as SDK might raise generic errors
-        if "401" in str(e) or "Unauthenticated" in str(e):
-             logger.error("Audio generation failed: Gemini authentication failed.")
-        else:
-             logger.error(f"Gemini generation exception: {e}")
+        _log_gemini_exception(e)
         return None
 
-def generate_voice(text: str, voice_id: str = DEFAULT_VOICE_ID, preferred_provider: str = None) -> Optional[bytes]:
+
+# --- Streaming Providers ---
+
+async def _astream_elevenlabs(text: str, voice_id: str = DEFAULT_VOICE_ID) -> AsyncIterator[bytes]:
     """
-    Generates audio from text using the configured provider with fallback.
-    Priority: Preferred -> ElevenLabs -> Gemini -> None
+    Streams MP3 chunks from the ElevenLabs `/stream` endpoint as they are synthesized.
+    Yields nothing if generation fails or key is missing.
     """
-    # 1. Determine Preference
+    api_key = os.getenv("ELEVENLABS_API_KEY", "").strip()
+    if not api_key:
+        logger.warning("ElevenLabs skipped: API Key missing.")
+        return
+
+    url, data, headers = _elevenlabs_request(text, voice_id, api_key)
+
+    try:
+        async with _get_http_client().stream(
+            "POST", f"{url}/stream", json=data, headers=headers,
+            params={"optimize_streaming_latency": "3", "output_format": ELEVENLABS_OUTPUT_FORMAT},
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                _handle_elevenlabs_response(response.status_code, body, body.decode(errors="replace"))
+                return
+            async for chunk in response.aiter_bytes():
+                if chunk:
+                    yield chunk
+    except Exception as e:
+        logger.error(f"ElevenLabs streaming exception: {e}")
+
+async def _astream_gemini(text: str) -> AsyncIterator[bytes]:
+    """
+    Streams Gemini PCM as a WAV byte stream (header first, then PCM chunks as they arrive).
+    The whole stream is bounded by TTS_TIMEOUT, like the one-shot request; on timeout it just ends.
+    """
+    api_key = os.getenv("GOOGLE_API_KEY", "").strip()
+    if not api_key:
+        logger.warning("Gemini Audio skipped: API Key missing.")
+        return
+
+    deadline = time.monotonic() + TTS_TIMEOUT
+    try:
+        client = _get_genai_client(api_key)
+        stream = await asyncio.wait_for(
+            client.aio.models.generate_content_stream(**_gemini_request(text)),
+            timeout=TTS_TIMEOUT,
+        )
+        responses = stream.__aiter__()
+        header_sent = False
+        while True:
+            # Per-item wait_for: a timeout scope can't span this generator's yields
+            try:
+                response = await asyncio.wait_for(responses.__anext__(), timeout=max(deadline - time.monotonic(), 0))
+            except StopAsyncIteration:
+                break
+            if not (response.candidates and response.candidates[0].content and response.candidates[0].content.parts):
+                continue
+            for part in response.candidates[0].content.parts:
+                if part.inline_data and part.inline_data.mime_type.startswith("audio") and part.inline_data.data:
+                    if not header_sent:
+                        yield wav_stream_header()
+                        header_sent = True
+                    yield part.inline_data.data
+    except asyncio.TimeoutError:
+        logger.warning(f"Gemini streaming timed out after {TTS_TIMEOUT}s. Ending the stream.")
+        try:
+            metrics.increment('echo_ops.tts.stream.timeout', tags=["service:sentinel-ai", "provider:gemini"])
+        except Exception:
+            pass
+    except Exception as e:
+        _log_gemini_exception(e)
+
+
+# --- Entry Points ---
+
+def _resolve_provider(preferred_provider: Optional[str]) -> str:
     if not preferred_provider:
         # Fallback to generic env if not specified
-        preferred_provider = os.getenv("VOICE_PROVIDER", "elevenlabs").lower().strip()
-    
-    preferred_provider = preferred_provider.lower().strip()
-    
+        preferred_provider = os.getenv("VOICE_PROVIDER", "elevenlabs")
+    return preferred_provider.lower().strip()
+
+
+async def agenerate_voice(text: str, voice_id: str = DEFAULT_VOICE_ID, preferred_provider: str = None) -> Optional[bytes]:
+    """
+    Generates audio from text using the configured provider with fallback.
+    Priority: Preferred -> ElevenLabs -> Gemini -> None
+    Text over TTS_CHUNK_CHARS is synthesized as parallel chunks and joined into one clip.
+    """
+    _, audio = await asynthesize_voice(text, voice_id, preferred_provider)
+    return await audio_encoder.aencode(audio) if audio else None
+
+
+async def asynthesize_voice(
+    text: str, voice_id: str = DEFAULT_VOICE_ID, preferred_provider: str = None
+) -> Tuple[Optional[str], Optional[bytes]]:
+    """
+    (provider, audio) in the provider's own format, before the output encoder (for callers that
+    join clips themselves). `provider` is the one that produced the clip: not necessarily the
+    preferred one, and None if its chunks came from different providers.
+    """
+    preferred_provider = _resolve_provider(preferred_provider)
+
     if preferred_provider == "none":
         logger.info("Voice generation disabled (Provider=none).")
-        return None
-        
-    logger.info(f"Attempting audio generation. Preference: {preferred_provider}")
+        return None, None
 
-    # 2. Try Preferred
-    audio = None
-    if preferred_provider == "elevenlabs":
-        audio = _generate_elevenlabs(text, voice_id)
-    elif preferred_provider == "gemini":
-        audio = _generate_gemini(text)
-    
+    chunks = _synthesis_chunks(text)
+    if len(chunks) > 1:
+        results = await asyncio.gather(*(_asynthesize(chunk, voice_id, preferred_provider) for chunk in chunks))
+        audio = _join_chunks([clip for _, clip in results])
+        if audio:
+            sources = {source for source, _ in results}
+            return (sources.pop() if len(sources) == 1 else None), audio
+    source, audio = await _asynthesize(text, voice_id, preferred_provider)
     if audio:
-        return audio
-        
-    # 3. Fallback logic
-    # If preferred failed (and wasn't just skipped), try the other one.
-    
-    if preferred_provider == "elevenlabs":
-        logger.info("ElevenLabs failed or missing. Falling back to Gemini.")
-        audio = _generate_gemini(text)
-    elif preferred_provider == "gemini":
-        logger.info("Gemini failed or missing. Falling back to ElevenLabs.")
-        audio = _generate_elevenlabs(text, voice_id)
-    else: 
+        return source, audio
+
+    logger.warning("All voice providers failed. Proceeding without audio.")
+    return None, None
+
+
+async def _asynthesize(text: str, voice_id: str, preferred_provider: str) -> Tuple[Optional[str], Optional[bytes]]:
+    """One provider call (with fallback) for `text`; (provider, raw provider output)."""
+    logger.info(f"Attempting audio generation. Preference: {preferred_provider}")
+
+    # Route: preferred first, then the other; open circuits skipped
+    providers = {
+        "elevenlabs": lambda: _agenerate_elevenlabs(text, voice_id),
+        "gemini": lambda: _agenerate_gemini(text),
+    }
+    if STUB_PROVIDERS:
+        providers = {name: (lambda name=name: stub_providers.agenerate(name, text, _wrap_pcm_wav)) for name in providers}
+    order = provider_registry.route(_preference_order(preferred_provider))
+    if not order:
+        logger.warning("All voice provider circuits are open.")
+        return None, None
+
+    if TTS_HEDGE and len(order) > 1:
+        return await _ahedged(order[0], order[1], providers)
+
+    for i, name in enumerate(order):
+        if i > 0:
+            logger.info(f"{order[i - 1]} failed or missing. Falling back to {name}.")
+        audio = await _atimed(name, providers[name])
+        if audio:
+            return name, audio
+    return None, None
+
+
+def _synthesis_chunks(text: str) -> List[str]:
+    if TTS_CHUNK_CHARS <= 0 or len(text) <= TTS_CHUNK_CHARS:
+        return [text]
+    return chunk_text(text, TTS_CHUNK_CHARS)
+
+
+def _join_chunks(clips: List[Optional[bytes]]) -> Optional[bytes]:
+    """Joined clip, or None (caller retries as a single request) if a chunk failed or formats differ."""
+    audio = join_clips(clips)
+    outcome = "joined" if audio else "fallback"
+    logger.info(f"Chunked synthesis: {len(clips)} chunks, {outcome}.")
+    try:
+        metrics.increment('echo_ops.tts.chunked', tags=["service:sentinel-ai", f"outcome:{outcome}"])
+        metrics.gauge('echo_ops.tts.chunked.chunks', len(clips), tags=["service:sentinel-ai"])
+    except Exception:
+        pass
+    return audio
+
+
+def _preference_order(preferred_provider: str) -> List[str]:
+    if preferred_provider == "gemini":
+        return ["gemini", "elevenlabs"]
+    if preferred_provider != "elevenlabs":
         # If random string provided, try defaults in order
         logger.warning(f"Unknown provider '{preferred_provider}'. Trying defaults.")
-        audio = _generate_elevenlabs(text, voice_id)
-        if not audio:
-             audio = _generate_gemini(text)
+    return ["elevenlabs", "gemini"]
+
+
+def _configured(name: str) -> bool:
+    """Providers without an API key are skipped without counting against their health."""
+    if STUB_PROVIDERS:
+        return True
+    key_env = {"elevenlabs": "ELEVENLABS_API_KEY", "gemini": "GOOGLE_API_KEY"}[name]
+    return bool(os.getenv(key_env, "").strip())
+
+
+def _admit(name: str) -> bool:
+    if not provider_registry.get(name).acquire():
+        logger.info(f"{name} circuit open. Skipping.")
+        return False
+    return True
+
+
+def _record(name: str, ok: bool, latency: float):
+    stats = provider_registry.get(name)
+    if ok:
+        stats.record_success(latency)
+    else:
+        stats.record_failure(latency)
 
+
+async def _atimed(name: str, call: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+    """
+    Runs a provider call through the circuit breaker and records its outcome.
+    Waits for one of the provider's concurrency slots first (not counted as latency).
+    A cancelled call (hedge loser) gives up its probe slot without a verdict.
+    """
+    if not _configured(name):
+        return await call()
+    async with _aprovider_slots[name]:
+        if not _admit(name):
+            return None
+        start = time.monotonic()
+        try:
+            audio = await call()
+        except asyncio.CancelledError:
+            provider_registry.get(name).release()
+            raise
+        _record(name, bool(audio), time.monotonic() - start)
+    return audio
+
+
+def _hedge_delay(provider: str) -> float:
+    stats = provider_registry.get(provider)
+    if len(stats.latencies) < TTS_HEDGE_MIN_SAMPLES:
+        return TTS_HEDGE_DEFAULT_DELAY
+    return stats.percentile(TTS_HEDGE_PERCENTILE)
+
+
+async def _ahedged(primary: str, secondary: str, providers: Dict[str, Callable]) -> Tuple[Optional[str], Optional[bytes]]:
+    """
+    Hedged request: if the primary hasn't answered within its recent latency percentile,
+    start the secondary too, keep whichever returns audio first and cancel the other.
+    """
+    _count_hedge("request", primary)  # Denominator for hedge rate
+    primary_task = asyncio.create_task(_atimed(primary, providers[primary]))
+    delay = _hedge_delay(primary)
+    done, _ = await asyncio.wait({primary_task}, timeout=delay)
+
+    if done:
+        audio = primary_task.result()
+        if audio:
+            return primary, audio
+        # Primary failed fast: plain fallback, no hedge
+        logger.info(f"{primary} failed or missing. Falling back to {secondary}.")
+        audio = await _atimed(secondary, providers[secondary])
+        return (secondary if audio else None), audio
+
+    logger.info(f"{primary} slower than {delay:.2f}s. Hedging with {secondary}.")
+    _count_hedge("fired", primary)
+    tasks = {primary_task: primary, asyncio.create_task(_atimed(secondary, providers[secondary])): secondary}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                audio = task.result()
+                if audio:
+                    _count_hedge("win", tasks[task])
+                    return tasks[task], audio
+        return None, None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _count_hedge(event: str, provider: str):
+    try:
+        metrics.increment(f'echo_ops.tts.hedge.{event}', tags=["service:sentinel-ai", f"provider:{provider}"])
+    except Exception:
+        pass
+
+
+async def astream_voice(
+    text: str, voice_id: str = DEFAULT_VOICE_ID, preferred_provider: str = None
+) -> AsyncIterator[Tuple[str, bytes]]:
+    """
+    Streams (provider, chunk) pairs from the first provider that produces audio.
+    Falls back to the other provider only if the preferred one fails before its first chunk.
+    """
+    preferred_provider = _resolve_provider(preferred_provider)
+    if preferred_provider == "none":
+        logger.info("Voice generation disabled (Provider=none).")
+        return
+
+    streams = {
+        "elevenlabs": lambda: _astream_elevenlabs(text, voice_id),
+        "gemini": lambda: _astream_gemini(text),
+    }
+    if STUB_PROVIDERS:
+        streams = {name: (lambda name=name: stub_providers.astream(name, text, wav_stream_header)) for name in streams}
+
+    for name in provider_registry.route(_preference_order(preferred_provider)):
+        configured = _configured(name)
+        if configured and not _admit(name):
+            continue
+        start = time.monotonic()
+        first_chunk_latency = None
+        try:
+            async for chunk in streams[name]():
+                if first_chunk_latency is None:
+                    first_chunk_latency = time.monotonic() - start
+                yield name, chunk
+        except BaseException:
+            if configured:
+                provider_registry.get(name).release()
+            raise
+        if configured:
+            produced = first_chunk_latency is not None
+            _record(name, produced, first_chunk_latency if produced else time.monotonic() - start)
+        if first_chunk_latency is not None:
+            return
+        logger.info(f"{name} streaming failed or missing. Trying next provider.")
+
+    logger.warning("All voice providers failed to stream. Proceeding without audio.")
+
+
+def _cache_lookup(text: str, voice_id: str, provider: str):
+    cache = get_audio_cache()
+    if provider == "none" or cache is None:
+        return None, None
+    # Stub audio must never be served as (or shadow) real provider output from the disk cache
+    model = "stub" if STUB_PROVIDERS else {
+        "elevenlabs": f"{MODEL_ID}/{ELEVENLABS_OUTPUT_FORMAT}", "gemini": GEMINI_TTS_MODEL
+    }.get(provider, "")
+    # Clips are cached after the output stage, so the encoding is part of the key
+    return cache, cache_key(text, voice_id, provider, f"{model}|{audio_encoder.profile}")
+
+
+async def agenerate_voice_cached(text: str, voice_id: str = DEFAULT_VOICE_ID, preferred_provider: str = None) -> Optional[bytes]:
+    """
+    Cache-fronted agenerate_voice.
+    Fixed acks ("Command processed.") are served from the audio cache without spending TTS quota.
+    A clip from a fallback provider is cached under that provider, so it is never served in place
+    of the preferred provider's voice once that provider recovers.
+    """
+    provider = _resolve_provider(preferred_provider)
+    cache, key = _cache_lookup(text, voice_id, provider)
+    if cache is None:
+        return await agenerate_voice(text, voice_id, provider)
+
+    audio = cache.get(key)
     if audio:
+        logger.info(f"Audio cache hit ({len(audio)} bytes, provider={provider}).")
         return audio
 
-    # 4. Give up
-    logger.warning("All voice providers failed. Proceeding without audio.")
-    return None
+    source, audio = await asynthesize_voice(text, voice_id, provider)
+    if not audio:
+        return None
+    audio = await audio_encoder.aencode(audio)
+    store_cached_voice(text, audio, voice_id, source)
+    return audio
+
+
+def peek_cached_voice(text: str, voice_id: str = DEFAULT_VOICE_ID, preferred_provider: str = None) -> Optional[bytes]:
+    """Cached clip for this (text, voice, provider), or None. Never calls a provider."""
+    cache, key = _cache_lookup(text, voice_id, _resolve_provider(preferred_provider))
+    return cache.get(key) if cache else None
+
+
+def store_cached_voice(text: str, audio: bytes, voice_id: str, provider: Optional[str]):
+    """
+    Caches an encoded clip under the provider that actually produced it.
+    Clips of unknown or mixed origin (`provider` None) are not cached.
+    """
+    if not provider:
+        return
+    cache, key = _cache_lookup(text, voice_id, provider)
+    if cache and audio:
+        cache.put(key, audio)